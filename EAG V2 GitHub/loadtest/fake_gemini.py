@@ -0,0 +1,270 @@
+"""Local stand-in for the Gemini generateContent endpoint.
+
+Lets talk2mcp (session 4) and the Perception layer (session 6) run without
+network access so the agent loop can be load-tested on any machine:
+
+    python fake_gemini.py --port 8089 --script script.example.json \
+        --latency lognormal:0.35,0.4 --error-rate 0.02 --timeout-rate 0.01 \
+        --tokens-per-second 150
+
+    # session 4
+    GEMINI_BASE_URL=http://127.0.0.1:8089 python talk2mcp.py
+    # session 6
+    GEMINI_BASE_URL=http://127.0.0.1:8089 python main.py
+
+Request and response bodies follow the REST API
+(POST /v1beta/models/<model>:generateContent), so both the google-genai and
+google-generativeai clients work unchanged. GET /stats returns counters.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GENERATE_PATH = re.compile(r"^/v1(?:beta|alpha)?\d*/models/(?P<model>[^/:]+):generateContent")
+
+DEFAULT_RESPONSE = "FINAL_ANSWER: done"
+
+
+def parse_latency(spec):
+    """Turn a latency spec into a function returning seconds.
+
+    Specs: fixed:S, uniform:A,B, normal:MEAN,STD, lognormal:MEDIAN,SIGMA,
+    exponential:MEAN. A bare number is treated as fixed.
+    """
+    if spec is None:
+        return lambda rng: 0.0
+    if isinstance(spec, (int, float)):
+        return lambda rng: float(spec)
+    kind, _, args = str(spec).partition(":")
+    if not args:
+        value = float(kind)
+        return lambda rng: value
+    values = [float(v) for v in args.split(",")]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        # values[0] is the median, values[1] the shape (sigma of the log)
+        mu = math.log(values[0]) if values[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+class Rule:
+    """One scripted response, chosen when pattern matches the prompt"""
+
+    def __init__(self, pattern, responses, latency=None, error_rate=None, timeout_rate=None):
+        self.pattern = re.compile(pattern, re.DOTALL)
+        self.responses = responses if isinstance(responses, list) else [responses]
+        self.latency = parse_latency(latency) if latency is not None else None
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def next_response(self):
+        # Responses are handed out in turn, which lets a script walk a multi-step flow
+        with self._lock:
+            response = self.responses[self._next % len(self.responses)]
+            self._next += 1
+        return response
+
+
+def load_script(path):
+    """Rules from a JSON file: [{"pattern": ..., "response(s)": ..., ...}, ...]"""
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    return [
+        Rule(
+            entry.get("pattern", ".*"),
+            entry.get("responses", entry.get("response", DEFAULT_RESPONSE)),
+            latency=entry.get("latency"),
+            error_rate=entry.get("error_rate"),
+            timeout_rate=entry.get("timeout_rate"),
+        )
+        for entry in entries
+    ]
+
+
+class FakeGemini:
+    """Configuration and counters shared by all request handler threads"""
+
+    def __init__(self, rules, latency, error_rate, timeout_rate, timeout_seconds,
+                 tokens_per_second, seed=None):
+        self.rules = rules
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.tokens_per_second = tokens_per_second
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "timeouts": 0, "unmatched": 0}
+
+    def count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def draw(self, fn):
+        with self._rng_lock:
+            return fn(self._rng)
+
+    def match(self, prompt):
+        for rule in self.rules:
+            if rule.pattern.search(prompt):
+                return rule
+        return None
+
+
+def prompt_text(body):
+    """Concatenated text parts of a generateContent request body"""
+    texts = []
+    contents = body.get("contents", [])
+    if isinstance(contents, dict):
+        contents = [contents]
+    for content in contents:
+        if isinstance(content, str):
+            texts.append(content)
+            continue
+        for part in content.get("parts", []):
+            if "text" in part:
+                texts.append(part["text"])
+    return "\n".join(texts)
+
+
+def approx_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "FakeGemini/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        fake = self.server.fake
+        if self.path.rstrip("/") == "/stats":
+            with fake._stats_lock:
+                self._send_json(200, dict(fake.stats))
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        fake = self.server.fake
+        match = GENERATE_PATH.match(self.path)
+        length = int(self.headers.get("Content-Length", "0") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        if not match:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+        fake.count("requests")
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"code": 400, "message": "Invalid JSON", "status": "INVALID_ARGUMENT"}})
+            return
+
+        prompt = prompt_text(body)
+        rule = fake.match(prompt)
+        if rule is None:
+            fake.count("unmatched")
+        latency = rule.latency if rule and rule.latency else fake.latency
+        error_rate = rule.error_rate if rule and rule.error_rate is not None else fake.error_rate
+        timeout_rate = rule.timeout_rate if rule and rule.timeout_rate is not None else fake.timeout_rate
+
+        roll = fake.draw(lambda rng: rng.random())
+        if roll < timeout_rate:
+            # Hold the request open well past any sane client timeout
+            fake.count("timeouts")
+            time.sleep(fake.timeout_seconds)
+            self._send_json(504, {"error": {"code": 504, "message": "Deadline exceeded", "status": "DEADLINE_EXCEEDED"}})
+            return
+
+        time.sleep(fake.draw(latency))
+        if roll < timeout_rate + error_rate:
+            fake.count("errors")
+            status, name = fake.draw(lambda rng: rng.choice([(429, "RESOURCE_EXHAUSTED"), (500, "INTERNAL"), (503, "UNAVAILABLE")]))
+            self._send_json(status, {"error": {"code": status, "message": "Injected error", "status": name}})
+            return
+
+        text = rule.next_response() if rule else DEFAULT_RESPONSE
+        output_tokens = approx_tokens(text)
+        if fake.tokens_per_second:
+            # Simulate generation speed on top of the time-to-first-token latency
+            time.sleep(output_tokens / fake.tokens_per_second)
+
+        fake.count("ok")
+        prompt_tokens = approx_tokens(prompt)
+        self._send_json(200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens,
+            },
+            "modelVersion": match.group("model"),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini generateContent server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--script", help="JSON file with scripted responses per prompt pattern")
+    parser.add_argument("--latency", default="fixed:0", help="e.g. fixed:0.2, uniform:0.1,0.5, lognormal:0.3,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/500/503")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument("--timeout-seconds", type=float, default=60.0, help="How long a hanging request hangs")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Output generation speed (0 = instant)")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible latency and fault injection")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    server.fake = FakeGemini(
+        rules=load_script(args.script),
+        latency=parse_latency(args.latency),
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds,
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+    )
+    print(f"Fake Gemini listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
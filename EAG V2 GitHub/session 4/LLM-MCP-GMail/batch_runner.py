@@ -0,0 +1,111 @@
+"""Run many talk2mcp queries from a JSONL file with bounded concurrency.
+
+Usage:
+    python batch_runner.py queries.jsonl results.jsonl --concurrency 8
+
+Each input line is {"id": ..., "query": "..."} (id is optional). Every query
+runs through talk2mcp.run_query on the shared session pool, and its record
+(status, tool trace, latency breakdown) is written to the output file as soon
+as it finishes, one JSON object per line. Queries that draw take turns on
+the one Paint canvas, which is closed after each of them.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import talk2mcp
+from logging_setup import setup_logging
+from metrics import percentile
+
+
+async def _read_jobs(input_path, queue, workers):
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                job = {"error": f"Invalid JSON on line {line_no}: {e}"}
+            if isinstance(job, str):
+                job = {"query": job}
+            elif not isinstance(job, dict):
+                # Reported as a failed job; the rest of the batch still runs
+                job = {"error": f"Line {line_no} is not a JSON object or string"}
+            job.setdefault("id", line_no)
+            # Blocks while the queue is full, so huge files are never read ahead
+            await queue.put((job, time.perf_counter()))
+    for _ in range(workers):
+        await queue.put(None)
+
+
+async def _worker(session, queue, out, latencies, statuses):
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        job, queued_at = item
+        queue_seconds = time.perf_counter() - queued_at
+        if "query" not in job:
+            record = {"query": None, "status": "error", "error": job.get("error", "Missing query")}
+        else:
+            try:
+                record = await talk2mcp.run_query(session, job["query"], reset_canvas=True)
+            except Exception as e:
+                record = {"query": job["query"], "status": "error", "error": str(e)}
+        record["id"] = job["id"]
+        record.setdefault("latency_ms", {})["queue"] = round(queue_seconds * 1000, 2)
+
+        out.write(json.dumps(record, default=str) + "\n")
+        out.flush()
+        statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+        if "total" in record["latency_ms"]:
+            latencies.append(record["latency_ms"]["total"])
+
+
+async def run_batch(input_path, output_path, concurrency=4):
+    """Run every query in input_path, at most concurrency at a time"""
+    started = time.perf_counter()
+    latencies = []
+    statuses = {}
+    try:
+        session = await talk2mcp.setup()
+        queue = asyncio.Queue(maxsize=concurrency * 2)
+        with open(output_path, "w", encoding="utf-8") as out:
+            await asyncio.gather(
+                _read_jobs(input_path, queue, concurrency),
+                *(_worker(session, queue, out, latencies, statuses) for _ in range(concurrency))
+            )
+    finally:
+        await talk2mcp.shutdown()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "queries": sum(statuses.values()),
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_qps": round(sum(statuses.values()) / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        },
+    }
+    print(f"Batch finished: {json.dumps(summary)}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run talk2mcp queries from a JSONL file")
+    parser.add_argument("input", help="JSONL file with one {\"id\", \"query\"} object per line")
+    parser.add_argument("output", help="JSONL file to write one result record per query")
+    parser.add_argument("--concurrency", type=int, default=4, help="Queries in flight at once")
+    args = parser.parse_args()
+    setup_logging()
+    asyncio.run(run_batch(args.input, args.output, max(1, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
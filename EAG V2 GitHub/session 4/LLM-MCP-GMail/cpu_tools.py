@@ -0,0 +1,295 @@
+"""Worker process pool and limits for the CPU-heavy math and image tools.
+
+Big factorials, powers and sequences are computed in separate processes so they
+never block the MCP server's event loop. Every call is checked against a size
+limit before any work starts and against a time limit while it runs; worker
+processes also get an address-space limit where the OS supports it.
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import sys
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+# Largest integer result (in decimal digits) a tool may produce
+MAX_DIGITS = int(os.getenv("MCP_MAX_DIGITS", "100000"))
+# Longest list a tool accepts or returns
+MAX_LIST_LENGTH = int(os.getenv("MCP_MAX_LIST_LENGTH", "100000"))
+# Most digits a list of integers may hold in total
+MAX_LIST_DIGITS = int(os.getenv("MCP_MAX_LIST_DIGITS", "1000000"))
+# Largest page a paginated tool returns in one response
+MAX_PAGE_SIZE = int(os.getenv("MCP_MAX_PAGE_SIZE", "1000"))
+# Wall-clock limit for one call in a worker process
+CALL_TIMEOUT = float(os.getenv("MCP_CPU_TIMEOUT", "5"))
+# Address-space limit for each worker process (0 disables it)
+WORKER_MEMORY_MB = int(os.getenv("MCP_WORKER_MEMORY_MB", "1024"))
+WORKERS = int(os.getenv("MCP_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this estimated size a call is cheaper to run inline than to ship to a worker
+INLINE_DIGITS = 2000
+
+LOG10_PHI = math.log10((1 + 5 ** 0.5) / 2)
+
+# JSON parsers, the MCP client's pydantic_core among them, reject integers
+# above Python's default 4300 digits. Results this long (in bits, rounded
+# down) go out as decimal strings; the tool's text output is the same.
+JSON_INT_DIGITS = 4300
+JSON_INT_BITS = int((JSON_INT_DIGITS - 1) / math.log10(2))
+
+# Workers must not be forked from the server: over stdio a thread is blocked
+# reading stdin, and a forked child deadlocks on that stdin lock when
+# multiprocessing closes its stdin. forkserver forks them from a helper
+# process that has this module preloaded; spawn starts each one fresh. Either
+# way a new worker then imports the server's main script (functions.py, with
+# FastMCP and the plugins) as __mp_main__, which multiprocessing does for
+# every child: about 0.6-0.8 s per worker, against under 10 ms when the main
+# script is a bare one. Workers are kept and reused, so that is paid once per
+# worker and again only for the one that replaces a timed-out call.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Python refuses to print ints above 4300 digits by default; allow what we permit
+if hasattr(sys, "set_int_max_str_digits"):
+    sys.set_int_max_str_digits(max(MAX_DIGITS + 1, 4300))
+
+
+class ToolLimitError(ValueError):
+    """Raised when a call would exceed, or did exceed, a resource limit"""
+
+
+def _init_worker(memory_mb, max_digits):
+    if resource is not None and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(max(max_digits + 1, 4300))
+
+
+# Size estimates, used to reject calls before doing any work
+
+def power_digits(a: int, b: int) -> int:
+    if b <= 0 or a in (0, 1, -1):
+        return 1
+    return int(b * math.log10(abs(a))) + 1
+
+
+def factorial_digits(a: int) -> int:
+    if a < 2:
+        return 1
+    return int(math.lgamma(a + 1) / math.log(10)) + 1
+
+
+def fibonacci_digits(n: int) -> int:
+    """Digits of the n-th Fibonacci number"""
+    return int(max(n, 1) * LOG10_PHI) + 1
+
+
+def fibonacci_range_digits(offset: int, limit: int) -> int:
+    """Upper bound on the total digits of F(offset) .. F(offset + limit - 1)"""
+    limit = max(limit, 0)
+    # F(k) has at most k * log10(phi) + 1 digits; sum that over the range
+    return int(LOG10_PHI * (offset * limit + limit * (limit - 1) / 2)) + limit
+
+
+def fibonacci_sequence_digits(n: int) -> int:
+    """Upper bound on the total digits of the first n Fibonacci numbers"""
+    return fibonacci_range_digits(0, n)
+
+
+def fibonacci_page_size(offset: int, limit: int) -> int:
+    """Largest page of at most limit values from F(offset) that stays within
+    MAX_DIGITS per value and MAX_LIST_DIGITS in total; 0 if not even one does"""
+    low, high = 0, max(limit, 0)
+    while low < high:
+        size = (low + high + 1) // 2
+        if (fibonacci_digits(offset + size - 1) <= MAX_DIGITS
+                and fibonacci_range_digits(offset, size) <= MAX_LIST_DIGITS):
+            low = size
+        else:
+            high = size - 1
+    return low
+
+
+def check_digits(tool: str, digits: int) -> None:
+    if digits > MAX_DIGITS:
+        raise ToolLimitError(
+            f"{tool} result would have about {digits} digits; the limit is {MAX_DIGITS}"
+        )
+
+
+def json_int(value):
+    """value itself, or its decimal string when it is too long for a JSON number"""
+    if isinstance(value, int) and value.bit_length() > JSON_INT_BITS:
+        return str(value)
+    return value
+
+
+def check_list_digits(tool: str, digits: int) -> None:
+    if digits > MAX_LIST_DIGITS:
+        raise ToolLimitError(
+            f"{tool} result would have about {digits} digits in total; the limit is {MAX_LIST_DIGITS}"
+        )
+
+
+def check_length(tool: str, length: int) -> None:
+    if length > MAX_LIST_LENGTH:
+        raise ToolLimitError(f"{tool} accepts at most {MAX_LIST_LENGTH} items, got {length}")
+
+
+# Work functions; module-level so worker processes can import them
+
+def fibonacci_pair(n: int) -> tuple:
+    """(F(n), F(n+1)) by fast doubling, in O(log n) big-int multiplications"""
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    a, b = 0, 1  # F(k), F(k+1) for k = the bits of n read so far
+    for bit in bin(n)[2:]:
+        # F(2k) = F(k) * (2F(k+1) - F(k)),  F(2k+1) = F(k)^2 + F(k+1)^2
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if bit == "1":
+            a, b = d, c + d
+        else:
+            a, b = c, d
+    return a, b
+
+
+def fibonacci_value(n: int) -> int:
+    return fibonacci_pair(n)[0]
+
+
+# The first values of the sequence are kept once computed, since most requests
+# only ever look at the start of it
+PREFIX_CACHE_SIZE = 5000
+_fibonacci_prefix = [0, 1]
+
+
+def fibonacci_range(offset: int, limit: int) -> list:
+    """F(offset), ..., F(offset + limit - 1)"""
+    if offset < 0 or limit <= 0:
+        return []
+    end = offset + limit
+    if end <= PREFIX_CACHE_SIZE:
+        while len(_fibonacci_prefix) < end:
+            _fibonacci_prefix.append(_fibonacci_prefix[-1] + _fibonacci_prefix[-2])
+        return _fibonacci_prefix[offset:end]
+    # Jump straight to the page with fast doubling, then walk it
+    a, b = fibonacci_pair(offset)
+    values = []
+    for _ in range(limit):
+        values.append(a)
+        a, b = b, a + b
+    return values
+
+
+def fibonacci_sequence(n: int) -> list:
+    return fibonacci_range(0, n)
+
+
+def _serve(conn, memory_mb, max_digits):
+    """Worker process loop: run each (fn, args) received on conn, send back the outcome"""
+    _init_worker(memory_mb, max_digits)
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            outcome = ("ok", fn(*args))
+        except BaseException as e:
+            outcome = ("error", e)
+        try:
+            conn.send(outcome)
+        except Exception as e:  # a result or exception that cannot be pickled
+            conn.send(("error", RuntimeError(f"{type(outcome[1]).__name__} could not be sent back: {e}")))
+
+
+class _Worker:
+    """One worker process that runs calls sent over a pipe, one at a time"""
+
+    def __init__(self, context, memory_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_serve, args=(child_conn, memory_mb, MAX_DIGITS), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    async def call(self, fn, args):
+        """(status, value) of fn(*args); the blocking recv waits in a thread"""
+        self.conn.send((fn, args))
+        return await asyncio.get_running_loop().run_in_executor(None, self.conn.recv)
+
+    def stop(self):
+        # The recv thread, if any, sees EOF once the process is gone
+        self.process.terminate()
+        self.process.join(1)
+        self.conn.close()
+
+
+class CpuPool:
+    """Lazily started worker processes; a call that overruns only loses its own worker"""
+
+    def __init__(self, workers=WORKERS, timeout=CALL_TIMEOUT, memory_mb=WORKER_MEMORY_MB):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._context = None
+        self._idle = []
+        self._slots = None
+
+    def _new_worker(self):
+        if self._context is None:
+            self._context = multiprocessing.get_context(START_METHOD)
+            if START_METHOD == "forkserver":
+                # Saves each worker importing this module, not the main script
+                self._context.set_forkserver_preload([__name__])
+        return _Worker(self._context, self.memory_mb)
+
+    async def run(self, tool, fn, *args, timeout=None):
+        """Run fn(*args) in a worker, mapping limit violations to ToolLimitError.
+
+        Each call has a worker to itself, so a call that times out or dies is
+        handled by stopping just that worker; a fresh one replaces it when
+        needed. Time spent waiting for a free worker does not count against
+        the call's timeout.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        async with self._slots:
+            worker = self._idle.pop() if self._idle else self._new_worker()
+            try:
+                status, value = await asyncio.wait_for(worker.call(fn, args), timeout=timeout)
+            except asyncio.TimeoutError:
+                # A running call cannot be interrupted, so its process is stopped
+                worker.stop()
+                raise ToolLimitError(f"{tool} exceeded the time limit of {timeout}s")
+            except (EOFError, OSError):
+                worker.stop()
+                raise ToolLimitError(
+                    f"{tool} worker process stopped (memory limit of {self.memory_mb} MB)"
+                )
+            except BaseException:
+                # Cancelled mid-call: the worker may still be busy with it
+                worker.stop()
+                raise
+            self._idle.append(worker)
+        if status == "ok":
+            return value
+        if isinstance(value, MemoryError):
+            raise ToolLimitError(f"{tool} exceeded the worker memory limit of {self.memory_mb} MB")
+        raise value
+
+    def shutdown(self):
+        while self._idle:
+            self._idle.pop().stop()
+
+
+cpu_pool = CpuPool()
@@ -0,0 +1,96 @@
+"""Dependency-aware execution of the tool calls in a plan."""
+import asyncio
+import re
+import time
+from collections import namedtuple
+
+# A parameter that is exactly $N is the result of the N-th step of the plan
+# (1-based); "$5" inside other text (an email body, Paint text) is left alone
+STEP_REF = re.compile(r"^\$(\d+)$")
+
+
+def step_ref(param):
+    """0-based index of the step param refers to, or None"""
+    match = STEP_REF.match(param.strip())
+    return int(match.group(1)) - 1 if match else None
+
+StepResult = namedtuple(
+    'StepResult',
+    'index func_name arguments iteration_result result_str failed error skipped elapsed'
+)
+
+
+def is_serial_tool(tool) -> bool:
+    """True for tools that change local shared state (e.g. the Paint window).
+
+    The server marks them as not read-only and closed-world; everything else,
+    including unannotated tools, may run concurrently with other calls.
+    """
+    annotations = getattr(tool, 'annotations', None)
+    if annotations is None:
+        return False
+    return annotations.readOnlyHint is False and annotations.openWorldHint is False
+
+
+def step_value(step: StepResult) -> str:
+    """Text used when a later step references this step's result"""
+    result = step.iteration_result
+    if isinstance(result, list) and len(result) == 1:
+        return str(result[0])
+    return step.result_str
+
+
+def plan_dependencies(calls, serial_tools):
+    """Return, for every step, the indexes of the earlier steps it must wait for"""
+    dependencies = []
+    last_serial = None
+    for i, (func_name, params) in enumerate(calls):
+        deps = set()
+        for param in params:
+            ref = step_ref(param)
+            if ref is not None and 0 <= ref < i:
+                deps.add(ref)
+        # Serial tools keep their plan order relative to each other
+        if func_name in serial_tools:
+            if last_serial is not None:
+                deps.add(last_serial)
+            last_serial = i
+        dependencies.append(sorted(deps))
+    return dependencies
+
+
+async def _run_step(index, func_name, params, deps, call):
+    done = {}
+    for dep_index, dep_task in deps:
+        dep = await dep_task
+        if dep.error is not None or dep.failed or dep.skipped:
+            # An earlier step this one relies on did not succeed
+            return StepResult(index, func_name, None, None, "", False, None, True, 0.0)
+        done[dep_index] = dep
+
+    resolved = [
+        step_value(done[step_ref(param)]) if step_ref(param) in done else param
+        for param in params
+    ]
+    started = time.perf_counter()
+    try:
+        arguments, iteration_result, result_str, failed = await call(func_name, resolved)
+    except Exception as e:
+        return StepResult(index, func_name, None, None, "", False, e, False, time.perf_counter() - started)
+    elapsed = time.perf_counter() - started
+    return StepResult(index, func_name, arguments, iteration_result, result_str, failed, None, False, elapsed)
+
+
+async def run_plan(calls, call, serial_tools=()):
+    """Run [(func_name, params), ...] with call(func_name, params), starting each
+    step as soon as the steps it depends on have finished.
+
+    Returns one StepResult per step, in plan order. Steps whose dependencies
+    failed are returned with skipped=True and are never called.
+    """
+    dependencies = plan_dependencies(calls, set(serial_tools))
+    tasks = []
+    for i, (func_name, params) in enumerate(calls):
+        deps = [(d, tasks[d]) for d in dependencies[i]]
+        tasks.append(asyncio.ensure_future(_run_step(i, func_name, params, deps, call)))
+    return list(await asyncio.gather(*tasks))
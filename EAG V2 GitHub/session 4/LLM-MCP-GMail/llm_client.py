@@ -0,0 +1,40 @@
+"""Async Gemini backend used by talk2mcp."""
+import asyncio
+from google import genai
+from google.genai import types
+
+
+class GeminiBackend:
+    """Native async Gemini client with a bounded number of in-flight requests.
+
+    Requests go through client.aio, so cancelling the awaiting task (for example
+    when asyncio.wait_for times out) aborts the HTTP request itself instead of
+    leaving a worker thread running. One client is kept for the lifetime of the
+    backend so its HTTP connection pool is reused across iterations.
+    """
+
+    def __init__(self, api_key, model="gemini-2.0-flash", max_concurrency=4, base_url=None):
+        # base_url points the client at another endpoint, e.g. loadtest/fake_gemini.py
+        http_options = types.HttpOptions(base_url=base_url) if base_url else None
+        self.client = genai.Client(api_key=api_key, http_options=http_options)
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def generate(self, prompt, timeout=10):
+        """Generate content for prompt, raising TimeoutError after timeout seconds"""
+        # Waiting for a free slot does not count against the request timeout
+        async with self._slots:
+            return await asyncio.wait_for(
+                self.client.aio.models.generate_content(
+                    model=self.model,
+                    contents=prompt
+                ),
+                timeout=timeout
+            )
+
+    async def aclose(self):
+        """Close the pooled HTTP connections"""
+        aclose = getattr(self.client.aio, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -0,0 +1,190 @@
+"""Pool of warm MCP client sessions for talk2mcp.
+
+When MCP_SERVER_URL is set the pool attaches to a long-lived `functions.py serve`
+daemon over HTTP/SSE on a local socket, so the server's imports and startup are
+paid once instead of on every run. Without it the pool falls back to spawning
+functions.py over stdio, as talk2mcp always did.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import sys
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+
+log = logging.getLogger("talk2mcp.pool")
+
+# Errors that mean the connection itself is gone and is worth re-opening
+CONNECTION_ERRORS = (
+    OSError,
+    EOFError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+
+def is_retry_safe(tool) -> bool:
+    """True for tools the server marks read-only or idempotent, so running a
+    call again after a dropped connection cannot repeat a side effect"""
+    annotations = getattr(tool, 'annotations', None)
+    if annotations is None:
+        return False
+    return annotations.readOnlyHint is True or annotations.idempotentHint is True
+
+
+class _Connection:
+    """One MCP session, owned by its own task.
+
+    The transport and ClientSession context managers are entered and exited in
+    that task, which keeps anyio's cancel scopes happy when a connection is
+    re-opened from whichever task noticed it had died.
+    """
+
+    def __init__(self, open_transport, message_handler):
+        self.open_transport = open_transport
+        self.message_handler = message_handler
+        self.session = None
+        self.error = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task = None
+
+    async def open(self, timeout):
+        self._task = asyncio.ensure_future(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise ConnectionError(f"Timed out connecting to MCP server after {timeout}s")
+        if self.session is None:
+            raise ConnectionError(f"Could not connect to MCP server: {self.error}")
+        return self
+
+    async def _run(self):
+        try:
+            async with self.open_transport() as streams:
+                read, write = streams[0], streams[1]
+                async with ClientSession(read, write, message_handler=self.message_handler) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    @property
+    def alive(self):
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def close(self):
+        self._closing.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except Exception:
+                self._task.cancel()
+
+
+class SessionPool:
+    """Round-robin pool of MCP sessions with transparent reconnect.
+
+    It offers the same list_tools()/call_tool() calls as a ClientSession, so it
+    can be passed anywhere talk2mcp expects a session. A call that fails because
+    the connection dropped is only retried for list_tools and tools that are
+    safe to repeat (see is_retry_safe); other calls may already have run on the
+    server, so the pool reconnects and raises instead of sending them twice.
+    """
+
+    def __init__(self, url=None, size=2, server_script="functions.py",
+                 message_handler=None, connect_timeout=30, retries=2):
+        self.url = url
+        # A stdio server is a child process per session; one is enough there
+        self.size = size if url else 1
+        self.server_script = server_script
+        self.message_handler = message_handler
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.connections = [None] * self.size
+        self.reconnects = 0
+        # Names of retry-safe tools, as of the last list_tools
+        self.retry_tools = set()
+        self._next = itertools.cycle(range(self.size))
+        self._locks = [asyncio.Lock() for _ in range(self.size)]
+
+    def _open_transport(self):
+        if self.url:
+            return sse_client(self.url)
+        # The whole environment, not mcp's minimal default, so settings such as
+        # MCP_PLUGINS, LOG_LEVEL and PAINT_BACKEND reach the server
+        server_params = StdioServerParameters(
+            command=sys.executable,
+            args=[self.server_script],
+            env={**os.environ},
+        )
+        return stdio_client(server_params)
+
+    async def _connection(self, slot):
+        """Live connection for slot, (re)connecting if needed"""
+        async with self._locks[slot]:
+            conn = self.connections[slot]
+            if conn is None or not conn.alive:
+                if conn is not None:
+                    self.reconnects += 1
+                    log.warning("MCP connection %d lost, reconnecting...", slot)
+                    await conn.close()
+                conn = _Connection(self._open_transport, self.message_handler)
+                self.connections[slot] = conn
+                await conn.open(self.connect_timeout)
+            return conn
+
+    async def start(self):
+        """Open every session up front so the first query does not pay for it"""
+        await asyncio.gather(*(self._connection(slot) for slot in range(self.size)))
+        target = self.url or f"stdio:{self.server_script}"
+        log.info("MCP session pool ready: %d session(s) to %s", self.size, target)
+        return self
+
+    async def _with_session(self, method, *args, retry=True, **kwargs):
+        slot = next(self._next)
+        for attempt in range(self.retries + 1):
+            conn = await self._connection(slot)
+            try:
+                return await getattr(conn.session, method)(*args, **kwargs)
+            except CONNECTION_ERRORS as e:
+                await conn.close()
+                if not retry:
+                    # The request may have reached the server; reconnect for the
+                    # next call but let the caller decide about this one
+                    log.warning("MCP %s failed on session %d (%r), not retrying", method, slot, e)
+                    try:
+                        await self._connection(slot)
+                    except ConnectionError as reconnect_error:
+                        log.warning("MCP reconnect of session %d failed: %s", slot, reconnect_error)
+                    raise
+                if attempt == self.retries:
+                    raise
+                log.warning("MCP %s failed on session %d (%r), retrying", method, slot, e)
+
+    async def list_tools(self):
+        result = await self._with_session("list_tools")
+        self.retry_tools = {tool.name for tool in result.tools if is_retry_safe(tool)}
+        return result
+
+    async def call_tool(self, name, arguments=None):
+        return await self._with_session(
+            "call_tool", name, arguments=arguments, retry=name in self.retry_tools
+        )
+
+    async def aclose(self):
+        for i, conn in enumerate(self.connections):
+            if conn is not None:
+                await conn.close()
+            self.connections[i] = None
@@ -0,0 +1,240 @@
+"""Per-tool call metrics for the MCP server in functions.py.
+
+instrument(mcp) makes every later @mcp.tool() record, per tool, call and error
+counts, a latency histogram and the sizes of arguments and results. The numbers
+are served as JSON (with p50/p95/p99 over recent calls) and in the Prometheus
+text format.
+
+A call counts as an error when it raises or when it returns the error message
+dict the Paint and Gmail tools use. Sizing arguments or a result must not cost
+as much as sending them, so large dicts and lists are only serialized for one
+in SIZE_SAMPLE of them, whose size is counted SIZE_SAMPLE times.
+"""
+import bisect
+import functools
+import inspect
+import json
+import time
+from collections import deque
+
+from mcp.server.fastmcp import Context, Image
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Percentiles are computed over this many most recent calls of each tool
+WINDOW = 1024
+# Dicts and lists with at most this many items in total are always sized exactly
+SMALL_PAYLOAD_ITEMS = 64
+# One in this many larger payloads of a tool is serialized to measure it
+SIZE_SAMPLE = 16
+# Start of the message of a tool that reports a failure instead of raising
+ERROR_MARKERS = ("Error", "Paint is not open", "No rectangle found", "Missing GMAIL_")
+
+
+def _cheap_size(value):
+    """Size in bytes of value when it is known without serializing it, else None"""
+    if isinstance(value, Image):
+        return len(value.data or b"")
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return None
+
+
+def _is_small(value, budget=SMALL_PAYLOAD_ITEMS):
+    """Whether value holds at most budget items and strings, nested ones included"""
+    pending = [value]
+    while pending:
+        item = pending.pop()
+        budget -= 1
+        if budget < 0:
+            return False
+        if isinstance(item, dict):
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            pending.extend(item)
+        elif isinstance(item, str) and len(item) > 1024:
+            return False
+    return True
+
+
+def _payload_size(value):
+    """Size in bytes of a tool argument set or result as sent over MCP"""
+    size = _cheap_size(value)
+    if size is None:
+        size = len(json.dumps(value, default=str).encode("utf-8"))
+    return size
+
+
+def is_error_result(result):
+    """True for a {"content": [...]} result whose first text reports a failure"""
+    if not isinstance(result, dict):
+        return False
+    content = result.get("content")
+    if not isinstance(content, list) or not content:
+        return False
+    text = getattr(content[0], "text", None)
+    return isinstance(text, str) and text.startswith(ERROR_MARKERS)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class _ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last one is +Inf
+        self.recent = deque(maxlen=WINDOW)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.large_payloads = 0
+
+
+class ToolMetrics:
+    """Counters and latency histograms keyed by tool name"""
+
+    def __init__(self):
+        self.tools = {}
+        self.started = time.time()
+
+    def _stats(self, tool):
+        stats = self.tools.get(tool)
+        if stats is None:
+            stats = self.tools[tool] = _ToolStats()
+        return stats
+
+    def payload_size(self, tool, value):
+        """Bytes to count for tool arguments or a result: exact when cheap,
+        sampled when large"""
+        size = _cheap_size(value)
+        if size is not None:
+            return size
+        if _is_small(value):
+            return _payload_size(value)
+        stats = self._stats(tool)
+        stats.large_payloads += 1
+        if stats.large_payloads % SIZE_SAMPLE != 1:
+            return 0
+        return _payload_size(value) * SIZE_SAMPLE
+
+    def record(self, tool, seconds, error, request_bytes, response_bytes):
+        stats = self._stats(tool)
+        stats.calls += 1
+        stats.errors += int(error)
+        stats.seconds += seconds
+        stats.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        stats.recent.append(seconds)
+        stats.request_bytes += request_bytes
+        stats.response_bytes += response_bytes
+
+    def wrap(self, name, fn):
+        """Async wrapper around tool fn that records every call"""
+        is_async = inspect.iscoroutinefunction(fn)
+
+        # functools.wraps keeps the signature FastMCP builds the input schema from
+        @functools.wraps(fn)
+        async def instrumented(*args, **kwargs):
+            started = time.perf_counter()
+            error = True
+            result = None
+            try:
+                result = fn(*args, **kwargs)
+                if is_async:
+                    result = await result
+                error = is_error_result(result)
+                return result
+            finally:
+                arguments = {k: v for k, v in kwargs.items() if not isinstance(v, Context)}
+                self.record(
+                    name,
+                    time.perf_counter() - started,
+                    error,
+                    self.payload_size(name, arguments),
+                    0 if result is None else self.payload_size(name, result),
+                )
+
+        return instrumented
+
+    def snapshot(self):
+        """Dict of per-tool stats, with latencies in milliseconds"""
+        tools = {}
+        uptime = time.time() - self.started
+        for name, stats in sorted(self.tools.items()):
+            recent = list(stats.recent)
+            tools[name] = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "calls_per_s": round(stats.calls / uptime, 3) if uptime else 0.0,
+                "latency_ms": {
+                    "mean": round(stats.seconds / stats.calls * 1000, 3) if stats.calls else 0.0,
+                    "p50": round(percentile(recent, 50) * 1000, 3),
+                    "p95": round(percentile(recent, 95) * 1000, 3),
+                    "p99": round(percentile(recent, 99) * 1000, 3),
+                    "total": round(stats.seconds * 1000, 3),
+                },
+                "request_bytes": stats.request_bytes,
+                "response_bytes": stats.response_bytes,
+            }
+        return {"uptime_s": round(uptime, 1), "tools": tools}
+
+    def prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP mcp_tool_calls_total Tool calls handled.",
+            "# TYPE mcp_tool_calls_total counter",
+        ]
+        items = sorted(self.tools.items())
+        lines += [f'mcp_tool_calls_total{{tool="{name}"}} {s.calls}' for name, s in items]
+        lines += [
+            "# HELP mcp_tool_errors_total Tool calls that raised or returned an error.",
+            "# TYPE mcp_tool_errors_total counter",
+        ]
+        lines += [f'mcp_tool_errors_total{{tool="{name}"}} {s.errors}' for name, s in items]
+        lines += [
+            "# HELP mcp_tool_request_bytes_total Size of tool arguments received.",
+            "# TYPE mcp_tool_request_bytes_total counter",
+        ]
+        lines += [f'mcp_tool_request_bytes_total{{tool="{name}"}} {s.request_bytes}' for name, s in items]
+        lines += [
+            "# HELP mcp_tool_response_bytes_total Size of tool results returned (large ones sampled).",
+            "# TYPE mcp_tool_response_bytes_total counter",
+        ]
+        lines += [f'mcp_tool_response_bytes_total{{tool="{name}"}} {s.response_bytes}' for name, s in items]
+        lines += [
+            "# HELP mcp_tool_duration_seconds Tool call latency.",
+            "# TYPE mcp_tool_duration_seconds histogram",
+        ]
+        for name, s in items:
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), s.buckets):
+                cumulative += count
+                lines.append(f'mcp_tool_duration_seconds_bucket{{tool="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'mcp_tool_duration_seconds_sum{{tool="{name}"}} {s.seconds:.6f}')
+            lines.append(f'mcp_tool_duration_seconds_count{{tool="{name}"}} {s.calls}')
+        return "\n".join(lines) + "\n"
+
+
+def instrument(mcp, metrics):
+    """Make mcp.tool() wrap every tool it registers with metrics.wrap"""
+    register = mcp.tool
+
+    @functools.wraps(register)
+    def tool(name=None, *args, **kwargs):
+        decorator = register(name, *args, **kwargs)
+
+        def wrap_and_register(fn):
+            decorator(metrics.wrap(name or fn.__name__, fn))
+            # The module keeps the plain function, so tools can still call each other
+            return fn
+
+        return wrap_and_register
+
+    mcp.tool = tool
+    return metrics
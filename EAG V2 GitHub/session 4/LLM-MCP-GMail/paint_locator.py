@@ -0,0 +1,189 @@
+"""Cached UI elements of the Paint window for plugins/paint_tools.py.
+
+Finding the Paint window, a toolbar button or the canvas walks the UI tree,
+and a button that is not there costs a full exists() timeout. The locator
+resolves each element once and keeps the wrapper and its rectangle. Before
+anything is handed out it checks the window handle and its screen rectangle
+with two cheap Win32 calls: a new handle (Paint restarted) or a moved or
+resized window drops the cached elements, anything else is a cache hit.
+Elements that were not found are cached too, so a missing button only costs
+its timeout once.
+"""
+import logging
+from collections import namedtuple
+
+log = logging.getLogger("functions.paint")
+
+# Fixed coordinates for 14" laptop (provided by user)
+CANVAS_TOP_LEFT = (355, 325)
+CANVAS_BOTTOM_RIGHT = (1555, 880)
+CanvasRect = namedtuple('CanvasRect', 'left top right bottom')
+
+# How long to look for an element that may not exist
+FIND_TIMEOUT = 1.0
+# Window class of the edit box Paint opens for the Text tool
+TEXT_BOX_CLASS = "RICHEDIT"
+
+
+def resolve_canvas(paint_window):
+    """Return (canvas_element, canvas_rect). Falls back to user-provided absolute coords."""
+    try:
+        canvas = paint_window.child_window(title_re=".*Canvas.*", control_type="Pane")
+        if canvas.exists(timeout=FIND_TIMEOUT):
+            try:
+                rect = canvas.rectangle()
+                return canvas.wrapper_object(), rect
+            except Exception:
+                pass
+    except Exception:
+        pass
+    try:
+        canvas = paint_window.child_window(class_name='MSPaintView')
+        # Even if this exists, prefer fixed rect for reliability
+    except Exception:
+        canvas = paint_window
+    rect = CanvasRect(
+        left=CANVAS_TOP_LEFT[0],
+        top=CANVAS_TOP_LEFT[1],
+        right=CANVAS_BOTTOM_RIGHT[0],
+        bottom=CANVAS_BOTTOM_RIGHT[1],
+    )
+    return canvas, rect
+
+
+class PaintLocator:
+    """Paint window, buttons and canvas, resolved once per window geometry"""
+
+    def __init__(self):
+        self.app = None
+        self.handle = None
+        self.spec = None        # WindowSpecification, used to search children
+        self.wrapper = None     # resolved window, used for input
+        self.geometry = None    # (left, top, right, bottom) of the window
+        self.elements = {}      # key -> (wrapper, rectangle), or None when not found
+        self.hits = 0
+        self.resolves = 0
+
+    def attach(self, app):
+        """Start over for a newly started Paint application"""
+        self.app = app
+        self.invalidate()
+
+    def invalidate(self):
+        self.handle = self.spec = self.wrapper = self.geometry = None
+        self.elements.clear()
+
+    def _resolve_window(self):
+        try:
+            spec = self.app.window(title_re=".*Paint")
+            wrapper = spec.wrapper_object()
+        except Exception:
+            spec = self.app.window(class_name='MSPaintApp')
+            wrapper = spec.wrapper_object()
+        self.handle = wrapper.handle
+        # Children are searched under this exact window from now on
+        self.spec = self.app.window(handle=self.handle)
+        self.wrapper = wrapper
+        self.resolves += 1
+
+    def window(self):
+        """Resolved Paint window wrapper; re-resolved only after it was recreated"""
+        import win32gui
+
+        if self.app is None:
+            raise RuntimeError("Paint is not open")
+        if self.handle is None or not win32gui.IsWindow(self.handle):
+            if self.handle is not None:
+                log.debug("Paint window was recreated, resolving it again")
+            self.invalidate()
+            self._resolve_window()
+        geometry = win32gui.GetWindowRect(self.handle)
+        if geometry != self.geometry:
+            if self.geometry is not None:
+                log.debug("Paint window moved or resized, dropping %d cached elements", len(self.elements))
+            self.elements.clear()
+            self.geometry = geometry
+        return self.wrapper
+
+    def window_rect(self):
+        """Screen rectangle of the Paint window, from the cache"""
+        self.window()
+        return CanvasRect(*self.geometry)
+
+    def element(self, key, **criteria):
+        """Wrapper of the child matching criteria, or None if there is none"""
+        self.window()
+        if key in self.elements:
+            self.hits += 1
+            cached = self.elements[key]
+            return cached[0] if cached else None
+        found = None
+        try:
+            spec = self.spec.child_window(**criteria)
+            if spec.exists(timeout=FIND_TIMEOUT):
+                wrapper = spec.wrapper_object()
+                found = (wrapper, wrapper.rectangle())
+        except Exception as e:
+            log.debug("Could not find %s: %s", key, e)
+        self.elements[key] = found
+        self.resolves += 1
+        return found[0] if found else None
+
+    def click(self, key, **criteria):
+        """Click the child matching criteria; False if it is not there"""
+        element = self.element(key, **criteria)
+        if element is None:
+            return False
+        try:
+            element.click_input()
+        except Exception as e:
+            # The cached wrapper went stale; find the element again next time
+            log.debug("Click on cached %s failed: %s", key, e)
+            self.elements.pop(key, None)
+            return False
+        return True
+
+    def is_selected(self, key):
+        """Whether a found toggle button is on; None when that cannot be told"""
+        element = self.elements.get(key)
+        if not element:
+            return None
+        wrapper = element[0]
+        if hasattr(wrapper, "get_toggle_state"):
+            return wrapper.get_toggle_state() == 1
+        if hasattr(wrapper, "is_selected"):
+            return bool(wrapper.is_selected())
+        return None
+
+    def text_box(self):
+        """Handle of Paint's text entry box while one is open, else None"""
+        import win32gui
+
+        boxes = []
+
+        def collect(hwnd, _):
+            if win32gui.GetClassName(hwnd).startswith(TEXT_BOX_CLASS):
+                boxes.append(hwnd)
+            return True
+
+        self.window()
+        win32gui.EnumChildWindows(self.handle, collect, None)
+        return boxes[0] if boxes else None
+
+    def text_box_text(self):
+        """Text typed into the open text box ("" when there is none)"""
+        import win32gui
+
+        box = self.text_box()
+        return win32gui.GetWindowText(box) if box else ""
+
+    def canvas(self):
+        """(canvas element, canvas rect) as resolve_canvas finds them"""
+        self.window()
+        cached = self.elements.get("canvas")
+        if cached:
+            self.hits += 1
+            return cached
+        self.elements["canvas"] = resolve_canvas(self.spec)
+        self.resolves += 1
+        return self.elements["canvas"]
@@ -0,0 +1,62 @@
+"""Tool plugins for the MCP server in functions.py.
+
+Each plugin module lists its tools in TOOLS and is only imported when it is
+enabled (MCP_PLUGINS=math,image,paint,email). Plugins keep heavy dependencies
+such as Pillow, NumPy, pywinauto and pywin32 out of their module imports and
+load them on first use, so enabling a plugin costs almost nothing at startup.
+"""
+import importlib
+import logging
+import time
+
+from mcp.types import ToolAnnotations
+
+logger = logging.getLogger("functions.plugins")
+
+# Pure tools: same arguments, same result, no side effects. Clients may cache them
+PURE_TOOL = ToolAnnotations(
+    readOnlyHint=True,
+    idempotentHint=True,
+    openWorldHint=False,
+)
+
+# Tools that drive the shared paint_app window are marked as state-changing and
+# closed-world, which tells clients to run them one at a time and in order
+PAINT_UI_TOOL = ToolAnnotations(
+    readOnlyHint=False,
+    destructiveHint=False,
+    idempotentHint=False,
+    openWorldHint=False,
+)
+
+AVAILABLE = {
+    "math": "plugins.math_tools",
+    "image": "plugins.image_tools",
+    "paint": "plugins.paint_tools",
+    "email": "plugins.email_tools",
+}
+
+
+def parse_plugin_list(value):
+    """Plugin names from a comma separated setting such as "math, paint" """
+    names = [name.strip().lower() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in AVAILABLE]
+    if unknown:
+        raise ValueError(f"Unknown plugin(s) {unknown}; available: {sorted(AVAILABLE)}")
+    return names
+
+
+def load_plugins(mcp, names):
+    """Import each named plugin and register its tools on mcp"""
+    loaded = []
+    for name in names:
+        started = time.perf_counter()
+        module = importlib.import_module(AVAILABLE[name])
+        for fn, annotations in module.TOOLS:
+            mcp.tool(annotations=annotations)(fn)
+        logger.info(
+            "Loaded plugin %s (%d tools) in %.1f ms",
+            name, len(module.TOOLS), (time.perf_counter() - started) * 1000
+        )
+        loaded.append(name)
+    return loaded
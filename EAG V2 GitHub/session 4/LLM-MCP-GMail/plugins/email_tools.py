@@ -0,0 +1,61 @@
+"""Email tools: send mail through Gmail's SMTP server."""
+import os
+
+from mcp.types import TextContent
+
+
+async def send_gmail(to: str, subject: str, body: str) -> dict:
+    """Send an email via Gmail using credentials from environment variables.
+
+    Required env vars:
+    - GMAIL_USER
+    - GMAIL_APP_PASSWORD
+    """
+    # smtplib pulls in ssl; only pay for it when mail is actually sent
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.utils import formataddr
+
+    try:
+        gmail_user = os.getenv("GMAIL_USER")
+        gmail_pass = os.getenv("GMAIL_APP_PASSWORD")
+        if not gmail_user or not gmail_pass:
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="Missing GMAIL_USER or GMAIL_APP_PASSWORD in environment."
+                    )
+                ]
+            }
+
+        msg = MIMEText(body, "plain", "utf-8")
+        msg["Subject"] = subject
+        msg["From"] = formataddr(("Automation Bot", gmail_user))
+        msg["To"] = to
+
+        with smtplib.SMTP("smtp.gmail.com", 587, timeout=20) as server:
+            server.ehlo()
+            server.starttls()
+            server.login(gmail_user, gmail_pass)
+            server.sendmail(gmail_user, [to], msg.as_string())
+
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Email sent to {to} with subject '{subject}'"
+                )
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(type="text", text=f"Error sending email: {str(e)}")
+            ]
+        }
+
+
+TOOLS = [
+    (send_gmail, None),
+]
@@ -0,0 +1,83 @@
+"""Image tools: single and bulk thumbnails."""
+import asyncio
+import logging
+import os
+import time
+
+from mcp.server.fastmcp import Image, Context
+
+from cpu_tools import cpu_pool
+from thumbnails import make_thumbnail, thumbnail_path, find_images, cache_thumbnail
+
+logger = logging.getLogger("functions.image")
+
+
+def create_thumbnail(image_path: str, width: int = 100, height: int = 100, format: str = "png") -> Image:
+    """Create a thumbnail from an image, as png, webp or jpeg"""
+    logger.debug("CALLED: create_thumbnail(image_path: str, width: int, height: int, format: str) -> Image:")
+    data, image_format, cached = make_thumbnail(image_path, width, height, format)
+    logger.debug("Thumbnail %s: %d bytes", "from cache" if cached else "encoded", len(data))
+    return Image(data=data, format=image_format)
+
+async def create_thumbnails(source: str, width: int = 100, height: int = 100, format: str = "png", ctx: Context = None) -> dict:
+    """Create thumbnails for every image in a directory or glob (e.g. photos/*.jpg); already cached ones are skipped"""
+    logger.debug("CALLED: create_thumbnails(source: str, width: int, height: int, format: str) -> dict:")
+    started = time.perf_counter()
+    paths = find_images(source)
+    results = []
+    pending = []
+    for path in paths:
+        cached_path = thumbnail_path(path, width, height, format)
+        if os.path.exists(cached_path):
+            results.append({"image": path, "thumbnail": cached_path, "status": "cached"})
+        else:
+            pending.append(path)
+
+    # Only hand the pool as many files as it has workers, so queued files
+    # do not use up their time limit while waiting
+    slots = asyncio.Semaphore(cpu_pool.workers)
+
+    async def thumbnail_one(path):
+        async with slots:
+            file_started = time.perf_counter()
+            try:
+                thumbnail, size = await cpu_pool.run(
+                    "create_thumbnails", cache_thumbnail, path, width, height, format
+                )
+            except Exception as e:
+                return {"image": path, "status": "error", "error": str(e)}
+            return {
+                "image": path,
+                "thumbnail": thumbnail,
+                "status": "created",
+                "bytes": size,
+                "ms": round((time.perf_counter() - file_started) * 1000, 1),
+            }
+
+    # Report each file as soon as it is done, not in input order
+    for next_result in asyncio.as_completed([thumbnail_one(path) for path in pending]):
+        result = await next_result
+        results.append(result)
+        if ctx is not None:
+            await ctx.report_progress(len(results), len(paths))
+            await ctx.info(f"{result['status']}: {result['image']}")
+
+    elapsed = time.perf_counter() - started
+    created = sum(1 for r in results if r["status"] == "created")
+    logger.info("create_thumbnails: %d created, %d cached in %.2fs", created, len(paths) - len(pending), elapsed)
+    return {
+        "files": len(paths),
+        "created": created,
+        "cached": len(paths) - len(pending),
+        "errors": len(pending) - created,
+        "elapsed_s": round(elapsed, 3),
+        "images_per_s": round(created / elapsed, 2) if elapsed else 0.0,
+        "results": results,
+    }
+
+
+# Thumbnails depend on files outside the server, so they are not marked pure
+TOOLS = [
+    (create_thumbnail, None),
+    (create_thumbnails, None),
+]
@@ -0,0 +1,787 @@
+"""Paint tools: draw rectangles and text on a canvas backend (see canvas_backend.py).
+
+On Windows the tools drive Microsoft Paint through pywinauto; with
+PAINT_BACKEND=pillow (the default elsewhere) they draw on an offscreen image.
+"""
+import os
+import time
+from itertools import groupby
+
+from mcp.types import TextContent
+
+from canvas_backend import BACKEND, Canvas, PillowCanvas
+from paint_locator import PaintLocator
+from plugins import PAINT_UI_TOOL
+from shape_registry import ShapeRegistry
+from ui_wait import waiter
+
+# Fixed coordinates for 14" laptop (provided by user)
+TOOL_RECT_COORDS = (795, 125)
+TOOL_TEXT_COORDS = (515, 130)
+
+# Paint's default palette: color name accepted by draw_scene -> palette button title
+PALETTE = {title.lower(): title for title in (
+    "Black", "Gray-50%", "Dark red", "Red", "Orange", "Yellow", "Green", "Turquoise",
+    "Indigo", "Purple", "White", "Gray-25%", "Brown", "Rose", "Gold", "Light yellow",
+    "Lime", "Light turquoise", "Blue-gray", "Lavender",
+)}
+# Color draw_scene selects for primitives that do not name one
+DEFAULT_COLOR = "black"
+# Most primitives one draw_scene call will take
+MAX_SCENE_PRIMITIVES = 200
+# Size of the text box draw_scene opens for text placed at a point
+TEXT_BOX_SIZE = (200, 40)
+
+# Window, buttons and canvas, kept until Paint moves, resizes or restarts
+locator = PaintLocator()
+# Every shape drawn on the current canvas, by id
+shapes = ShapeRegistry()
+
+def set_clipboard_text(text: str) -> None:
+    """Place plain text onto the Windows clipboard."""
+    import win32clipboard as clipboard
+    import win32con as wcon
+
+    clipboard.OpenClipboard()
+    try:
+        clipboard.EmptyClipboard()
+        clipboard.SetClipboardData(wcon.CF_UNICODETEXT, text)
+    finally:
+        clipboard.CloseClipboard()
+
+def clipboard_text() -> str:
+    """Plain text currently on the Windows clipboard."""
+    import win32clipboard as clipboard
+    import win32con as wcon
+
+    clipboard.OpenClipboard()
+    try:
+        return clipboard.GetClipboardData(wcon.CF_UNICODETEXT)
+    finally:
+        clipboard.CloseClipboard()
+
+def grab_screen(bbox):
+    """Raw screen pixels in bbox (left, top, right, bottom)"""
+    from PIL import ImageGrab
+
+    return ImageGrab.grab(bbox=bbox).tobytes()
+
+def region_changed(bbox, before):
+    """Wait condition: Paint redrew the screen pixels in bbox (they differ from before)"""
+    return lambda: grab_screen(bbox) != before
+
+def text_box_open():
+    """Wait condition: Paint's text entry box is open"""
+    # text_box() gives None while there is none, which waiter.until would take
+    # as "cannot be observed" and sleep out the fixed time
+    return locator.text_box() is not None
+
+def text_box_opened():
+    """Wait condition for an action that should open a text box; call it before
+    the action. A box that is already open says nothing about the action, so
+    the wait then sleeps its fixed time."""
+    try:
+        already_open = text_box_open()
+    except Exception:
+        already_open = True
+    return (lambda: None) if already_open else text_box_open
+
+def text_pasted(text):
+    """Wait condition: Paint's text box holds text"""
+    # The box may normalize line breaks, so only compare the first line
+    first_line = text.splitlines()[0] if text else ""
+    return lambda: first_line in locator.text_box_text()
+
+async def focus_window(paint_window, name, fixed):
+    """Bring Paint to the front unless it already has focus"""
+    if not paint_window.has_focus():
+        paint_window.set_focus()
+        await waiter.until(f"{name}.focus", paint_window.has_focus, fixed)
+
+async def select_rectangle_tool(paint_window, name):
+    """Select the Rectangle tool: fixed coords, then UIA, then likely toolbar spots"""
+    # Select Rectangle tool via fixed coords (user-provided); then UIA; then approximate
+    try:
+        paint_window.click_input(coords=TOOL_RECT_COORDS)
+    except Exception:
+        pass
+    # Select Rectangle tool via UIA when available; fallback to approximate region
+    try:
+        if not locator.click("rectangle_button", title_re=".*Rectangle.*", control_type="Button"):
+            raise RuntimeError("Rectangle button not found")
+    except Exception:
+        try:
+            win_rect = locator.window_rect()
+            # Try a few likely toolbar locations (smaller 14" screens often pack toolbar tighter)
+            candidates = [
+                (int(win_rect.left + 0.24 * (win_rect.right - win_rect.left)), int(win_rect.top + 0.10 * (win_rect.bottom - win_rect.top))),
+                (int(win_rect.left + 0.28 * (win_rect.right - win_rect.left)), int(win_rect.top + 0.12 * (win_rect.bottom - win_rect.top))),
+                (int(win_rect.left + 0.32 * (win_rect.right - win_rect.left)), int(win_rect.top + 0.14 * (win_rect.bottom - win_rect.top))),
+            ]
+            clicked = False
+            for cx, cy in candidates:
+                try:
+                    paint_window.click_input(coords=(cx, cy))
+                    clicked = True
+                    break
+                except Exception:
+                    continue
+            if not clicked:
+                raise RuntimeError("Failed to click Rectangle tool")
+        except Exception:
+            pass
+    await waiter.until(f"{name}.tool", lambda: locator.is_selected("rectangle_button"), 0.2)
+
+async def select_text_tool(paint_window, name, fixed):
+    """Open the Home tab and select the Text tool via UIA or its keyboard accelerator"""
+    try:
+        paint_window.type_keys('%h')  # Alt+H for Home tab
+        await waiter.until(f"{name}.home_tab", None, 0.2)
+    except Exception:
+        pass
+    try:
+        if not locator.click("text_button", title_re="^Text$|.*Text.*", control_type="Button"):
+            raise RuntimeError("Text button not found")
+    except Exception:
+        try:
+            paint_window.type_keys('t')  # Accelerator for Text tool on Home tab
+        except Exception:
+            pass
+    await waiter.until(f"{name}.tool", lambda: locator.is_selected("text_button"), fixed)
+
+async def drag(paint_window, start, end, name):
+    """Click at start, then drag the mouse from start to end (screen coords)"""
+    # Click and press show nothing on screen, so those waits stay fixed sleeps
+    try:
+        paint_window.click_input(coords=start)
+        await waiter.until(f"{name}.click", None, 0.05)
+    except Exception:
+        pass
+    paint_window.press_mouse_input(coords=start)
+    await waiter.until(f"{name}.press", None, 0.05)
+    # Moving draws the outline of the shape or text box under the drag
+    bbox = (min(start[0], end[0]), min(start[1], end[1]), max(start[0], end[0]) + 1, max(start[1], end[1]) + 1)
+    try:
+        before = grab_screen(bbox)
+        drawn = region_changed(bbox, before)
+    except Exception:
+        drawn = None
+    paint_window.move_mouse_input(coords=end)
+    await waiter.until(f"{name}.move", drawn, 0.05)
+    paint_window.release_mouse_input(coords=end)
+
+async def drag_rectangle(paint_window, c_rect, x1, y1, x2, y2, name):
+    """Drag out a rectangle with the selected tool; returns it as canvas (left, top, right, bottom)"""
+    # Normalize coordinates to top-left and bottom-right
+    tlx, tly = min(x1, x2), min(y1, y2)
+    brx, bry = max(x1, x2), max(y1, y2)
+
+    # Convert canvas-relative to absolute screen coordinates and clamp within canvas
+    start_x, start_y = c_rect.left + tlx, c_rect.top + tly
+    end_x, end_y = c_rect.left + brx, c_rect.top + bry
+    start_x = max(c_rect.left + 2, min(start_x, c_rect.right - 2))
+    start_y = max(c_rect.top + 2, min(start_y, c_rect.bottom - 2))
+    end_x = max(c_rect.left + 2, min(end_x, c_rect.right - 2))
+    end_y = max(c_rect.top + 2, min(end_y, c_rect.bottom - 2))
+
+    await drag(paint_window, (start_x, start_y), (end_x, end_y), name)
+    return tlx, tly, brx, bry
+
+def text_box_at(x, y):
+    """Canvas box a text placed at (x, y) is assumed to take"""
+    return x, y, x + TEXT_BOX_SIZE[0], y + TEXT_BOX_SIZE[1]
+
+def inner_box(rectangle, margin=10):
+    """Text box inside a canvas rectangle, with small margins to stay inside the border"""
+    x1, y1, x2, y2 = rectangle
+    left = x1 + margin
+    top = y1 + margin
+    right = max(left + 40, x2 - margin)
+    bottom = max(top + 20, y2 - margin)
+    return left, top, right, bottom
+
+async def paste_text(paint_window, text, name, fixed_clipboard, fixed_paste):
+    """Paste text via the clipboard, which avoids hotkey interpretation"""
+    set_clipboard_text(text)
+    await waiter.until(f"{name}.clipboard", lambda: clipboard_text() == text, fixed_clipboard)
+    paint_window.type_keys('^v')
+    await waiter.until(f"{name}.paste", text_pasted(text), fixed_paste)
+
+async def type_in_box(paint_window, c_rect, box, text, name):
+    """Drag a text box over canvas box (left, top, right, bottom) and paste text into it"""
+    left, top, right, bottom = box
+    # Convert to absolute screen coords and drag to create text box
+    abs_left, abs_top = c_rect.left + left, c_rect.top + top
+    abs_right, abs_bottom = c_rect.left + right, c_rect.top + bottom
+    abs_left = max(c_rect.left + 4, min(abs_left, c_rect.right - 8))
+    abs_top = max(c_rect.top + 4, min(abs_top, c_rect.bottom - 8))
+    abs_right = max(abs_left + 10, min(abs_right, c_rect.right - 4))
+    abs_bottom = max(abs_top + 10, min(abs_bottom, c_rect.bottom - 4))
+    opened = text_box_opened()
+    await drag(paint_window, (abs_left, abs_top), (abs_right, abs_bottom), name)
+    await waiter.until(f"{name}.text_box", opened, 0.25)
+
+    # Click inside the created text region to ensure caret focus; the caret
+    # cannot be observed, so these keep their fixed sleeps
+    center_x = (abs_left + abs_right) // 2
+    center_y = (abs_top + abs_bottom) // 2
+    paint_window.click_input(coords=(center_x, center_y))
+    await waiter.until(f"{name}.caret", None, 0.15)
+    paint_window.click_input(coords=(center_x + 5, center_y + 3))
+    await waiter.until(f"{name}.caret", None, 0.15)
+
+    await paste_text(paint_window, text, name, 0.1, 0.3)
+
+def click_palette_color(color):
+    """Click color's palette button; False if the color or its button is not available"""
+    title = PALETTE.get(color.strip().lower())
+    if title is None:
+        return False
+    return locator.click(f"color {title}", title=title, control_type="Button")
+
+
+class WindowsPaintCanvas(Canvas):
+    """The live MS Paint window, driven through pywinauto"""
+
+    name = "windows"
+
+    def __init__(self):
+        self.op = "paint"
+        self.window = None
+        self.c_rect = None
+
+    @property
+    def is_open(self):
+        return locator.app is not None
+
+    async def open(self):
+        # pywinauto and pywin32 are only loaded once Paint is actually used
+        from pywinauto.application import Application
+        import win32con
+        import win32gui
+
+        paint_app = Application().start('mspaint.exe')
+        locator.attach(paint_app)
+        await waiter.until("open_paint.window", lambda: paint_app.window(class_name='MSPaintApp').exists(timeout=0), 0.2, timeout=5.0)
+        
+        # Get the Paint window
+        paint_window = paint_app.window(class_name='MSPaintApp')
+        
+        # Maximize the window
+        win32gui.ShowWindow(paint_window.handle, win32con.SW_MAXIMIZE)
+        # Bring to foreground explicitly
+        try:
+            win32gui.SetForegroundWindow(paint_window.handle)
+        except Exception:
+            pass
+        await waiter.until("open_paint.foreground", lambda: win32gui.GetForegroundWindow() == paint_window.handle, 0.2)
+        return "Paint opened successfully and maximized"
+
+    async def prepare(self, op, focus_wait=0.2):
+        # Get the Paint window and canvas (cached), and make sure Paint is active
+        self.op = op
+        self.window = locator.window()
+        await focus_window(self.window, op, focus_wait)
+        _, self.c_rect = locator.canvas()
+
+    async def select_tool(self, tool, wait=0.3):
+        if tool == "rectangle":
+            await select_rectangle_tool(self.window, self.op)
+        else:
+            await select_text_tool(self.window, self.op, wait)
+
+    async def select_color(self, color):
+        return click_palette_color(color)
+
+    async def rectangle(self, x1, y1, x2, y2):
+        return await drag_rectangle(self.window, self.c_rect, x1, y1, x2, y2, self.op)
+
+    async def text_in_box(self, box, text):
+        await type_in_box(self.window, self.c_rect, box, text, self.op)
+
+    async def text_at(self, x, y, text):
+        c_rect = self.c_rect
+        # Click on canvas to place text box using canvas-relative converted to screen coords
+        canvas_click_x = max(c_rect.left + 4, min(c_rect.right - 4, c_rect.left + x))
+        canvas_click_y = max(c_rect.top + 4, min(c_rect.bottom - 4, c_rect.top + y))
+        opened = text_box_opened()
+        self.window.click_input(coords=(canvas_click_x, canvas_click_y))
+        await waiter.until(f"{self.op}.text_box", opened, 0.5)
+
+        # Paste the text passed from client via clipboard to avoid hotkey interpretation
+        await paste_text(self.window, text, self.op, 0.05, 0.5)
+
+        # Click to exit text mode near canvas bottom-right
+        self.window.click_input(coords=(c_rect.right - 8, c_rect.bottom - 8))
+
+    def export_png(self):
+        # A screenshot of the canvas area
+        from PIL import ImageGrab
+        import io
+
+        if self.c_rect is None:
+            self.c_rect = locator.canvas()[1]
+        buffer = io.BytesIO()
+        ImageGrab.grab(bbox=tuple(self.c_rect)).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    async def close(self):
+        paint_app = locator.app
+        locator.attach(None)
+        self.window = self.c_rect = None
+        # Killed rather than closed, so no "save changes?" dialog is left behind
+        paint_app.kill()
+        return "Paint closed"
+
+
+# The surface every tool draws on
+canvas = WindowsPaintCanvas() if BACKEND == "windows" else PillowCanvas()
+
+async def draw_rectangle(x1: int, y1: int, x2: int, y2: int) -> dict:
+    """Draw a rectangle in Paint from (x1,y1) to (x2,y2)"""
+    try:
+        if not canvas.is_open:
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="Paint is not open. Please call open_paint first."
+                    )
+                ]
+            }
+        
+        # Only the part on the canvas is drawn and registered
+        box = shapes.fit((x1, y1, x2, y2))
+
+        # Ensure Paint is active, then select the Rectangle tool
+        await canvas.prepare("draw_rectangle", 0.2)
+        await canvas.select_tool("rectangle")
+        tlx, tly, brx, bry = await canvas.rectangle(*box)
+
+        shape = shapes.add("rectangle", (tlx, tly, brx, bry))
+        
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Rectangle drawn from ({tlx},{tly}) to ({brx},{bry}) as shape {shape.id}"
+                )
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Error drawing rectangle: {str(e)}"
+                )
+            ]
+        }
+
+async def add_text_in_paint(text: str) -> dict:
+    """Add text in Paint"""
+    try:
+        if not canvas.is_open:
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="Paint is not open. Please call open_paint first."
+                    )
+                ]
+            }
+        
+        # Ensure Paint is active, select the Text tool and type near the canvas top-left
+        await canvas.prepare("add_text_in_paint", 0.5)
+        await canvas.select_tool("text", 0.5)
+        await canvas.text_at(150, 120, text)
+        shape = shapes.add("text", text_box_at(150, 120), text=text)
+    
+      
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Text:'{text}' added successfully as shape {shape.id}"
+                )
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Error: {str(e)}"
+                )
+            ]
+        }
+
+async def get_last_rectangle_center() -> dict:
+    """Get the center coordinates (x,y) of the last drawn rectangle"""
+    try:
+        last_rectangle = shapes.last("rectangle")
+        if not last_rectangle:
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="No rectangle found. Draw a rectangle first."
+                    )
+                ]
+            }
+
+        x1, y1, x2, y2 = last_rectangle.box
+        cx = int((x1 + x2) / 2)
+        cy = int((y1 + y2) / 2)
+        return {
+            "content": [
+                TextContent(type="text", text=f"{cx},{cy}")
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(type="text", text=f"Error: {str(e)}")
+            ]
+        }
+
+async def add_text_in_paint_at(text: str, x: int, y: int) -> dict:
+    """Add text in Paint at provided canvas coordinates (x,y)"""
+    try:
+        if not canvas.is_open:
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="Paint is not open. Please call open_paint first."
+                    )
+                ]
+            }
+
+        box = shapes.fit(text_box_at(x, y))
+        await canvas.prepare("add_text_in_paint_at", 0.3)
+        await canvas.select_tool("text", 0.3)
+        await canvas.text_at(x, y, text)
+        shape = shapes.add("text", box, text=text)
+
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Text:'{text}' added at ({x},{y}) as shape {shape.id}"
+                )
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(type="text", text=f"Error: {str(e)}")
+            ]
+        }
+
+async def text_inside(target, text, op):
+    """Type text in a text box inside the target shape and register it"""
+    x1, y1, x2, y2 = target.box
+    box = inner_box(target.box)
+    await canvas.prepare(op, 0.3)
+    await canvas.select_tool("text", 0.3)
+    await canvas.text_in_box(box, text)
+    shape = shapes.add("text", box, text=text)
+    return {
+        "content": [
+            TextContent(
+                type="text",
+                text=f"Text inserted inside {target.kind} {target.id} ({x1},{y1})-({x2},{y2}) as shape {shape.id}"
+            )
+        ]
+    }
+
+async def add_text_inside_last_rectangle(text: str) -> dict:
+    """Create a text box constrained within the last drawn rectangle and type text"""
+    try:
+        if not canvas.is_open:
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="Paint is not open. Please call open_paint first."
+                    )
+                ]
+            }
+        last_rectangle = shapes.last("rectangle")
+        if not last_rectangle:
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="No rectangle found. Draw a rectangle first."
+                    )
+                ]
+            }
+        return await text_inside(last_rectangle, text, "add_text_inside_last_rectangle")
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(type="text", text=f"Error: {str(e)}")
+            ]
+        }
+
+async def add_text_inside_shape(shape_id: int, text: str) -> dict:
+    """Create a text box inside the shape with id shape_id (from draw_rectangle, draw_scene or list_shapes) and type text"""
+    try:
+        if not canvas.is_open:
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="Paint is not open. Please call open_paint first."
+                    )
+                ]
+            }
+        target = shapes.get(shape_id)
+        if target is None:
+            return {
+                "content": [
+                    TextContent(type="text", text=f"Error: no shape {shape_id} on the canvas")
+                ]
+            }
+        return await text_inside(target, text, "add_text_inside_shape")
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(type="text", text=f"Error: {str(e)}")
+            ]
+        }
+
+async def list_shapes() -> dict:
+    """List the shapes on the canvas with their ids, boxes (left, top, right, bottom) and centers"""
+    return {"shapes": [shapes.describe(shape) for shape in shapes.shapes.values()]}
+
+async def shapes_at(x: int, y: int) -> dict:
+    """List the shapes whose box contains canvas point (x,y), topmost first"""
+    return {"x": x, "y": y, "shapes": [shapes.describe(shape) for shape in shapes.at(x, y)]}
+
+async def find_free_space(x: int, y: int, width: int, height: int) -> dict:
+    """Find the free width x height box (overlapping no shape) closest to canvas point (x,y)"""
+    box = shapes.free_space_near(x, y, width, height)
+    if box is None:
+        return {
+            "content": [
+                TextContent(type="text", text=f"Error: no free {width}x{height} space on the canvas")
+            ]
+        }
+    left, top, right, bottom = box
+    return {"box": [left, top, right, bottom], "center": [(left + right) // 2, (top + bottom) // 2]}
+
+def scene_step(item):
+    """(kind, step) for one draw_scene primitive; raises ValueError if it is malformed
+    or off the canvas"""
+    kind = str(item.get("type", "")).lower()
+    color = str(item.get("color") or "").strip().lower()
+    if kind == "rectangle":
+        return kind, {"color": color, "box": shapes.fit(tuple(int(item[k]) for k in ("x1", "y1", "x2", "y2")))}
+    if kind == "text":
+        step = {"color": color, "text": str(item["text"]), "inside": None, "shape": None, "at": None}
+        if item.get("inside") is not None:
+            step["inside"] = int(item["inside"])
+        elif item.get("shape") is not None:
+            step["shape"] = int(item["shape"])
+        elif "x" in item and "y" in item:
+            step["at"] = (int(item["x"]), int(item["y"]))
+            shapes.fit(text_box_at(*step["at"]))
+        else:
+            raise ValueError("text needs inside (a rectangle index), shape (a shape id) or x and y")
+        return kind, step
+    raise ValueError(f"unknown type {kind!r} (use rectangle or text)")
+
+async def draw_scene(primitives: list[dict]) -> dict:
+    """Draw many rectangles and texts in one call. Each primitive is
+    {"type": "rectangle", "x1": int, "y1": int, "x2": int, "y2": int} or
+    {"type": "text", "text": str, "inside": index of a rectangle in this list},
+    {"type": "text", "text": str, "shape": id of a shape already on the canvas}
+    or {"type": "text", "text": str, "x": int, "y": int}; either may add
+    "color" (a Paint palette name such as "red"). Returns a status and shape id
+    per primitive."""
+    if not canvas.is_open:
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text="Paint is not open. Please call open_paint first."
+                )
+            ]
+        }
+    if len(primitives) > MAX_SCENE_PRIMITIVES:
+        return {
+            "content": [
+                TextContent(type="text", text=f"Error: at most {MAX_SCENE_PRIMITIVES} primitives per scene")
+            ]
+        }
+
+    started = time.perf_counter()
+    results = [None] * len(primitives)
+    steps = {"rectangle": [], "text": []}
+    for index, item in enumerate(primitives):
+        try:
+            kind, step = scene_step(item)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            results[index] = {"index": index, "status": "error", "error": f"Invalid primitive: {e}"}
+            continue
+        steps[kind].append((index, step))
+
+    drawn = {}  # index of a rectangle primitive -> its canvas rectangle
+    placed = {}  # index of a drawn primitive -> (kind, box, color, text) to register
+    tool_switches = color_switches = 0
+    try:
+        await canvas.prepare("draw_scene", 0.2)
+
+        # Rectangles first, so text can go inside them; within a tool, one group
+        # per color (in primitive order), so each tool and color is selected once.
+        # Uncolored primitives are drawn in DEFAULT_COLOR rather than whatever
+        # color the previous group (or call) left selected
+        def color_of(entry):
+            return entry[1]["color"] or DEFAULT_COLOR
+
+        for kind in ("rectangle", "text"):
+            if not steps[kind]:
+                continue
+            await canvas.select_tool(kind)
+            tool_switches += 1
+
+            by_color = sorted(steps[kind], key=color_of)
+            for color, group in groupby(by_color, key=color_of):
+                color_ok = await canvas.select_color(color)
+                color_switches += 1
+                for index, step in group:
+                    result = {"index": index, "type": kind, "status": "ok"}
+                    if not color_ok:
+                        result["warning"] = f"Color {color!r} not available, used the current color"
+                    try:
+                        if kind == "rectangle":
+                            drawn[index] = await canvas.rectangle(*step["box"])
+                            result["rectangle"] = list(drawn[index])
+                        else:
+                            if step["inside"] is not None:
+                                if step["inside"] not in drawn:
+                                    raise ValueError(f"primitive {step['inside']} is not a drawn rectangle")
+                                box = inner_box(drawn[step["inside"]])
+                            elif step["shape"] is not None:
+                                target = shapes.get(step["shape"])
+                                if target is None:
+                                    raise ValueError(f"no shape {step['shape']} on the canvas")
+                                box = inner_box(target.box)
+                            else:
+                                box = text_box_at(*step["at"])
+                            await canvas.text_in_box(box, step["text"])
+                        placed[index] = (kind, drawn[index] if kind == "rectangle" else box,
+                                         step["color"], step.get("text"))
+                    except Exception as e:
+                        result = {"index": index, "type": kind, "status": "error", "error": str(e)}
+                    results[index] = result
+    except Exception as e:
+        # The canvas itself is gone; everything not drawn yet fails the same way
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = {"index": index, "status": "error", "error": str(e)}
+
+    # Register in primitive order, so ids (and the last rectangle) follow the
+    # list rather than the color grouping
+    for kind in ("rectangle", "text"):
+        for index in sorted(placed):
+            if placed[index][0] == kind:
+                results[index]["shape_id"] = shapes.add(*placed[index]).id
+    elapsed = time.perf_counter() - started
+    ok = sum(1 for result in results if result["status"] == "ok")
+    return {
+        "primitives": len(primitives),
+        "drawn": ok,
+        "errors": len(primitives) - ok,
+        "tool_switches": tool_switches,
+        "color_switches": color_switches,
+        "elapsed_s": round(elapsed, 3),
+        "results": results,
+    }
+
+async def open_paint() -> dict:
+    """Open Microsoft Paint maximized on secondary monitor (a blank offscreen canvas when headless)"""
+    try:
+        message = await canvas.open()
+        # A new, blank canvas: ids start over
+        shapes.clear()
+        
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=message
+                )
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Error opening Paint: {str(e)}"
+                )
+            ]
+        }
+
+async def close_paint() -> dict:
+    """Close Paint (the offscreen canvas when headless), discarding the drawing; open_paint starts a new one"""
+    try:
+        if not canvas.is_open:
+            return {
+                "content": [
+                    TextContent(type="text", text="Paint was not open, nothing to close")
+                ]
+            }
+        message = await canvas.close()
+        shapes.clear()
+        return {
+            "content": [
+                TextContent(type="text", text=message)
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(type="text", text=f"Error closing Paint: {str(e)}")
+            ]
+        }
+
+async def save_canvas(path: str) -> dict:
+    """Save the current canvas as a PNG file at path"""
+    try:
+        if not canvas.is_open:
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="Paint is not open. Please call open_paint first."
+                    )
+                ]
+            }
+        data = canvas.export_png()
+        path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return {
+            "content": [
+                TextContent(type="text", text=f"Canvas saved to {path} ({len(data)} bytes)")
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(type="text", text=f"Error: {str(e)}")
+            ]
+        }
+
+
+TOOLS = [(tool, PAINT_UI_TOOL) for tool in (
+    draw_rectangle, add_text_in_paint, get_last_rectangle_center,
+    add_text_in_paint_at, add_text_inside_last_rectangle, add_text_inside_shape,
+    list_shapes, shapes_at, find_free_space, draw_scene, open_paint, close_paint, save_canvas,
+)]
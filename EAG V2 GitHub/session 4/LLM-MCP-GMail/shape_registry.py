@@ -0,0 +1,169 @@
+"""Shapes drawn on the current canvas, for plugins/paint_tools.py.
+
+Every rectangle and text the Paint tools draw is registered with a stable id
+and its bounding box in canvas pixels, so later tool calls can refer to any
+shape ("text inside shape 3") instead of only the last rectangle. Boxes are
+kept in a uniform grid of CELL x CELL buckets: a point or box query only looks
+at the buckets it touches, so it costs about the same with 5 or 500 shapes on
+the canvas. Boxes are clipped to the canvas first, so no call ever touches
+more buckets than the canvas has. Opening a new canvas starts a new registry.
+"""
+import math
+from collections import namedtuple
+
+from canvas_backend import CANVAS_SIZE
+
+# Grid bucket size in canvas pixels, about the size of a small shape
+CELL = 64
+
+# box is (left, top, right, bottom); text is None for rectangles
+Shape = namedtuple("Shape", "id kind box color text")
+
+
+def normalize_box(x1, y1, x2, y2):
+    """(left, top, right, bottom) of two opposite corners"""
+    return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
+
+def boxes_overlap(a, b):
+    """Whether boxes a and b share at least one pixel"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class ShapeRegistry:
+    """Shapes on one canvas by id, with a grid index over their boxes"""
+
+    def __init__(self, size=CANVAS_SIZE, cell=CELL):
+        self.size = size
+        self.cell = cell
+        self.shapes = {}    # id -> Shape, in drawing order
+        self.grid = {}      # (column, row) -> set of ids whose box touches that bucket
+        self.next_id = 1
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def clear(self):
+        """Forget every shape; ids start again at 1"""
+        self.shapes.clear()
+        self.grid.clear()
+        self.next_id = 1
+
+    def _clip(self, box):
+        """box normalized and clipped to the canvas; None if it has no area left"""
+        width, height = self.size
+        left, top, right, bottom = normalize_box(*box)
+        left, top = max(left, 0), max(top, 0)
+        right, bottom = min(right, width - 1), min(bottom, height - 1)
+        if right <= left or bottom <= top:
+            return None
+        return left, top, right, bottom
+
+    def fit(self, box):
+        """box clipped to the canvas; ValueError if it is outside it or has no area"""
+        clipped = self._clip(box)
+        if clipped is None:
+            raise ValueError(
+                f"box {tuple(box)} has no area on the {self.size[0]}x{self.size[1]} canvas"
+            )
+        return clipped
+
+    def _buckets(self, box):
+        left, top, right, bottom = box
+        for column in range(left // self.cell, right // self.cell + 1):
+            for row in range(top // self.cell, bottom // self.cell + 1):
+                yield column, row
+
+    def add(self, kind, box, color="", text=None):
+        """Register a drawn shape (clipped to the canvas); returns it with its new id"""
+        shape = Shape(self.next_id, kind, self.fit(box), color or "", text)
+        self.next_id += 1
+        self.shapes[shape.id] = shape
+        for bucket in self._buckets(shape.box):
+            self.grid.setdefault(bucket, set()).add(shape.id)
+        return shape
+
+    def get(self, shape_id):
+        """Shape with this id, or None"""
+        return self.shapes.get(shape_id)
+
+    def last(self, kind=None):
+        """Most recently drawn shape (of kind, if given), or None"""
+        for shape in reversed(self.shapes.values()):
+            if kind is None or shape.kind == kind:
+                return shape
+        return None
+
+    def _candidates(self, box):
+        ids = set()
+        for bucket in self._buckets(box):
+            ids.update(self.grid.get(bucket, ()))
+        return ids
+
+    def at(self, x, y):
+        """Shapes whose box contains (x, y), topmost (latest drawn) first"""
+        point = (x, y, x, y)
+        hits = [self.shapes[i] for i in self._candidates(point) if boxes_overlap(self.shapes[i].box, point)]
+        return sorted(hits, key=lambda shape: -shape.id)
+
+    def overlapping(self, box):
+        """Shapes whose box overlaps box, in drawing order"""
+        box = self._clip(box)
+        if box is None:
+            return []
+        hits = [self.shapes[i] for i in self._candidates(box) if boxes_overlap(self.shapes[i].box, box)]
+        return sorted(hits, key=lambda shape: shape.id)
+
+    def _is_free(self, box):
+        return not any(boxes_overlap(self.shapes[i].box, box) for i in self._candidates(box))
+
+    def free_space_near(self, x, y, width, height, margin=4):
+        """Box of width x height that overlaps no shape (keeping margin pixels
+        away), stays on the canvas and has its center as close to (x, y) as a
+        search on a half-cell grid finds; None when there is no room."""
+        if width < 1 or height < 1:
+            raise ValueError("width and height must be at least 1")
+        canvas_width, canvas_height = self.size
+        if width + 2 * margin > canvas_width or height + 2 * margin > canvas_height:
+            return None
+        step = max(1, self.cell // 2)
+        max_left, max_top = canvas_width - width - margin, canvas_height - height - margin
+
+        def placed(dx, dy):
+            # Box centered at (x + dx, y + dy), pushed back onto the canvas
+            left = min(max(x + dx - width // 2, margin), max_left)
+            top = min(max(y + dy - height // 2, margin), max_top)
+            return left, top, left + width, top + height
+
+        # Rings of grid offsets around (x, y), nearest first within each ring;
+        # a ring further out than the canvas can only repeat clamped positions
+        rings = math.ceil(max(canvas_width, canvas_height) / step)
+        for ring in range(rings + 1):
+            offsets = [
+                (dx * step, dy * step)
+                for dx in range(-ring, ring + 1)
+                for dy in range(-ring, ring + 1)
+                if max(abs(dx), abs(dy)) == ring
+            ]
+            offsets.sort(key=lambda offset: offset[0] ** 2 + offset[1] ** 2)
+            for dx, dy in offsets:
+                box = placed(dx, dy)
+                padded = (box[0] - margin, box[1] - margin, box[2] + margin, box[3] + margin)
+                if self._is_free(padded):
+                    return box
+        return None
+
+    def describe(self, shape):
+        """JSON-friendly dict of a shape"""
+        left, top, right, bottom = shape.box
+        described = {
+            "id": shape.id,
+            "type": shape.kind,
+            "box": [left, top, right, bottom],
+            "center": [(left + right) // 2, (top + bottom) // 2],
+        }
+        if shape.color:
+            described["color"] = shape.color
+        if shape.text is not None:
+            described["text"] = shape.text
+        return described
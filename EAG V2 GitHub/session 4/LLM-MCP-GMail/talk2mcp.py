@@ -1,12 +1,26 @@
 import os
-import sys
 from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters, types
-from mcp.client.stdio import stdio_client
+from mcp import types
 import asyncio
-from google import genai
+import itertools
+import json
+import logging
+import re
+import sys
+import time
 from concurrent.futures import TimeoutError
 from functools import partial
+# Helpers shared by the Paint and Gmail clients live in session 4/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from transcript import Transcript
+from llm_client import GeminiBackend
+from executor import run_plan
+from tool_catalog import ToolCatalog, UnknownToolError
+from result_cache import ResultCache
+from mcp_pool import SessionPool
+from logging_setup import setup_logging
+
+log = logging.getLogger("talk2mcp")
 import smtplib
 from email.mime.text import MIMEText
 from email.utils import formataddr
@@ -14,278 +28,478 @@ from email.utils import formataddr
 # Load environment variables from .env file
 load_dotenv()
 
-# Access your API key and initialize Gemini client correctly
+# Access your API key and initialize the async Gemini backend
 api_key = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=api_key)
+llm = GeminiBackend(
+    api_key=api_key,
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+    base_url=os.getenv("GEMINI_BASE_URL")
+)
 
-max_iterations = 5
-last_response = None
-iteration = 0
-iteration_response = []
+max_iterations = int(os.getenv("MAX_ITERATIONS", "5"))
+transcript_max_bytes = int(os.getenv("TRANSCRIPT_MAX_BYTES", "4000"))
+# Plan mode: the model returns the whole tool sequence in one response
+plan_mode = os.getenv("PLAN_MODE", "1") == "1"
+# Tools described in the prompt: the best TOOL_TOP_K matches for the query (0 = all)
+tool_top_k = int(os.getenv("TOOL_TOP_K", "8"))
+# Tool descriptions and argument converters, shared by every run in this process
+catalog = ToolCatalog()
+# Results of pure tools, reused within a run and (via the cache file) across runs
+result_cache = ResultCache(
+    max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("TOOL_CACHE_TTL", "3600"))
+)
 
-async def generate_with_timeout(client, prompt, timeout=10):
+async def generate_with_timeout(llm, prompt, timeout=10):
     """Generate content with a timeout"""
-    print("Starting LLM generation...")
+    log.debug("Starting LLM generation...")
     try:
-        # Convert the synchronous generate_content call to run in a thread
-        loop = asyncio.get_event_loop()
-        response = await asyncio.wait_for(
-            loop.run_in_executor(
-                None, 
-                lambda: client.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=prompt
-                )
-            ),
-            timeout=timeout
-        )
-        print("LLM generation completed")
+        # The request runs on the backend's own async client, so a timeout
+        # cancels it instead of leaving a thread busy in the default executor
+        response = await llm.generate(prompt, timeout=timeout)
+        log.debug("LLM generation completed")
         return response
     except TimeoutError:
-        print("LLM generation timed out!")
+        log.warning("LLM generation timed out!")
         raise
     except Exception as e:
-        print(f"Error in LLM generation: {e}")
+        log.error("Error in LLM generation: %s", e)
         raise
 
-def reset_state():
-    """Reset all global variables to their initial state"""
-    global last_response, iteration, iteration_response
-    last_response = None
-    iteration = 0
-    iteration_response = []
 
-async def main():
-    reset_state()  # Reset at the start of main
-    print("Starting main execution...")
+# Response formats the model is asked to follow
+SINGLE_STEP_RULES = """- Respond with EXACTLY ONE line and NOTHING ELSE.
+- For tool invocations, use:  FUNCTION_CALL: function_name|param1|param2|...
+- For final completion, use:  FINAL_ANSWER: done
+- Only call tools that exist. Supply parameters in the correct order and types.
+- For arithmetic with more than one operation, call evaluate once with the whole expression."""
+
+PLAN_RULES = """- Respond with the COMPLETE ordered plan, one step per line, and NOTHING ELSE.
+- Each tool invocation is one line:  FUNCTION_CALL: function_name|param1|param2|...
+- End the plan with the line:  FINAL_ANSWER: done
+- Only call tools that exist. Supply parameters in the correct order and types.
+- For arithmetic with more than one operation, call evaluate once with the whole expression.
+- To pass the result of an earlier step as a parameter, write just $N as that parameter (N = position of that FUNCTION_CALL in the plan, starting at 1); $N inside other text is not replaced.
+- If earlier iterations are listed after the query, plan only the remaining steps."""
+
+# Tool results that mean a step did not do what the plan expected
+ERROR_MARKERS = ("Error", "Paint is not open", "No rectangle found", "Missing GMAIL_")
+
+def parse_response(response_text):
+    """Return ([(func_name, params), ...], finished) from the model's response"""
+    calls = []
+    finished = False
+    for line in response_text.split('\n'):
+        # Tolerate numbered or bulleted plan lines
+        line = line.strip().lstrip("-*0123456789.) ")
+        if line.startswith("FUNCTION_CALL:"):
+            _, function_info = line.split(":", 1)
+            parts = [p.strip() for p in function_info.split("|")]
+            calls.append((parts[0], parts[1:]))
+        elif line.startswith("FINAL_ANSWER:"):
+            finished = True
+            break
+    return calls, finished
+
+def content_texts(text):
+    """Inner texts when a tool returned a {"content": [TextContent, ...]} dict
+    (which FastMCP sends as one JSON text item), else [text]"""
+    if not text.lstrip().startswith("{"):
+        return [text]
     try:
-        # Remove early-send; flow should be LLM -> MCP -> send_gmail tool
+        payload = json.loads(text)
+    except ValueError:
+        return [text]
+    if not isinstance(payload, dict) or set(payload) != {"content"} or not isinstance(payload["content"], list):
+        return [text]
+    return [item.get("text", "") if isinstance(item, dict) else str(item) for item in payload["content"]]
 
-        # Create a single MCP server connection
-        print("Establishing connection to MCP server...")
-        server_params = StdioServerParameters(
-            command=sys.executable,
-            args=["functions.py"]
-        )
+def is_error_result(result, result_str):
+    """True when a tool call reported an error instead of doing its job"""
+    if getattr(result, 'isError', False):
+        return True
+    return result_str.lstrip("[").startswith(ERROR_MARKERS)
 
-        async with stdio_client(server_params) as (read, write):
-            print("Connection established, creating session...")
-            async with ClientSession(read, write) as session:
-                print("Session created, initializing...")
-                await session.initialize()
-                
-                # Get available tools
-                print("Requesting tool list...")
-                tools_result = await session.list_tools()
-                tools = tools_result.tools
-                print(f"Successfully retrieved {len(tools)} tools")
-                
-
-                # Create system prompt with available tools
-                print("Creating system prompt...")
-                print(f"Number of tools: {len(tools)}")
-                
-                try:
-                    # First, let's inspect what a tool object looks like
-                    # if tools:
-                    #     print(f"First tool properties: {dir(tools[0])}")
-                    #     print(f"First tool example: {tools[0]}")
-                    
-                    tools_description = []
-                    for i, tool in enumerate(tools):
-                        try:
-                            # Get tool properties
-                            params = tool.inputSchema
-                            desc = getattr(tool, 'description', 'No description available')
-                            name = getattr(tool, 'name', f'tool_{i}')
-                            
-                            # Format the input schema in a more readable way
-                            if 'properties' in params:
-                                param_details = []
-                                for param_name, param_info in params['properties'].items():
-                                    param_type = param_info.get('type', 'unknown')
-                                    param_details.append(f"{param_name}: {param_type}")
-                                params_str = ', '.join(param_details)
-                            else:
-                                params_str = 'no parameters'
-
-                            tool_desc = f"{i+1}. {name}({params_str}) - {desc}"
-                            tools_description.append(tool_desc)
-                            print(f"Added description for tool: {tool_desc}")
-                        except Exception as e:
-                            print(f"Error processing tool {i}: {e}")
-                            tools_description.append(f"{i+1}. Error processing tool")
-                    
-                    tools_description = "\n".join(tools_description)
-                    print("Successfully created tools description")
-                except Exception as e:
-                    print(f"Error creating tools description: {e}")
-                    tools_description = "Error loading tools"
-                
-                print("Created system prompt...")
+async def execute_call(session, catalog, func_name, params):
+    """Convert params using the tool's schema, call the tool and return
+    (arguments, iteration_result, result_str, failed)"""
+    log.debug("Function name: %s", func_name)
+    log.debug("Raw parameters: %s", params)
+    # Prepare arguments with the tool's precompiled converter
+    arguments = catalog.convert(func_name, params)
 
-                system_prompt = f"""You are an automation agent using tools via an MCP server.
+    log.debug("Final arguments: %s", arguments)
+
+    # Pure tools return the same result for the same arguments
+    pure = func_name in catalog.pure_tools
+    if pure:
+        cached = result_cache.get(func_name, arguments)
+        if cached is not None:
+            log.debug("Cache hit for %s", func_name)
+            iteration_result, result_str = cached
+            return arguments, iteration_result, result_str, False
+
+    log.debug("Calling tool %s", func_name)
+    
+    result = await session.call_tool(func_name, arguments=arguments)
+    # Lazy %s: the (possibly large) raw result is only formatted at DEBUG level
+    log.debug("Raw result: %s", result)
+    
+    # Get the full result content
+    if hasattr(result, 'content'):
+        log.debug("Result has content attribute")
+        # Handle multiple content items
+        if isinstance(result.content, list):
+            # Paint and Gmail tools wrap their message in a content dict; use the message itself
+            iteration_result = [
+                text
+                for item in result.content
+                for text in (content_texts(item.text) if hasattr(item, 'text') else [str(item)])
+            ]
+        else:
+            iteration_result = str(result.content)
+    else:
+        log.debug("Result has no content attribute")
+        iteration_result = str(result)
+        
+    log.debug("Final iteration result: %s", iteration_result)
+    
+    # Format the response based on result type
+    if isinstance(iteration_result, list):
+        result_str = f"[{', '.join(iteration_result)}]"
+    else:
+        result_str = str(iteration_result)
+
+    failed = is_error_result(result, result_str)
+    if pure and not failed:
+        result_cache.put(func_name, arguments, (iteration_result, result_str))
+    return arguments, iteration_result, result_str, failed
+
+def build_system_prompt(tools_description):
+    """System prompt listing the available tools"""
+    return f"""You are an automation agent using tools via an MCP server.
 
 Available tools (call exactly by these names):
 {tools_description}
 
 Rules for responses (STRICT):
-- Respond with EXACTLY ONE line and NOTHING ELSE.
-- For tool invocations, use:  FUNCTION_CALL: function_name|param1|param2|...
-- For final completion, use:  FINAL_ANSWER: done
-- Only call tools that exist. Supply parameters in the correct order and types.
+{PLAN_RULES if plan_mode else SINGLE_STEP_RULES}
 
 Task policy:
 - Call send_gmail with three parameters: to|subject|body.
 - After you successfully perform the call, respond with FINAL_ANSWER: done.
 """
 
-                # User task to execute via tools
-                default_to = os.getenv("GMAIL_TO", "recipient@example.com")
-                default_subject = os.getenv("GMAIL_SUBJECT", "Automation Notification")
-                default_body = os.getenv("GMAIL_BODY", "Triggered from talk2mcp.py via MCP")
-                query = f"Send an email using send_gmail to {default_to} with subject {default_subject} and body {default_body}."
-                print("Starting iteration loop...")
-                
-                # Use global iteration variables
-                global iteration, last_response
-                
-                while iteration < max_iterations:
-                    print(f"\n--- Iteration {iteration + 1} ---")
-                    if last_response is None:
-                        current_query = query
-                    else:
-                        current_query = current_query + "\n\n" + " ".join(iteration_response)
-                        current_query = current_query + "  What should I do next?"
-
-                    # Get model's response with timeout
-                    print("Preparing to generate LLM response...")
-                    prompt = f"{system_prompt}\n\nQuery: {current_query}"
-                    try:
-                        response = await generate_with_timeout(client, prompt)
-                        response_text = response.text.strip()
-                        print(f"LLM Response: {response_text}")
-                        
-                        # Find the FUNCTION_CALL line in the response
-                        for line in response_text.split('\n'):
-                            line = line.strip()
-                            if line.startswith("FUNCTION_CALL:"):
-                                response_text = line
-                                break
-                        
-                    except Exception as e:
-                        print(f"Failed to get LLM response: {e}")
-                        break
-
-
-                    if response_text.startswith("FUNCTION_CALL:"):
-                        _, function_info = response_text.split(":", 1)
-                        parts = [p.strip() for p in function_info.split("|")]
-                        func_name, params = parts[0], parts[1:]
-                        
-                        print(f"\nDEBUG: Raw function info: {function_info}")
-                        print(f"DEBUG: Split parts: {parts}")
-                        print(f"DEBUG: Function name: {func_name}")
-                        print(f"DEBUG: Raw parameters: {params}")
-                        
-                        try:
-                            # Find the matching tool to get its input schema
-                            tool = next((t for t in tools if t.name == func_name), None)
-                            if not tool:
-                                print(f"DEBUG: Available tools: {[t.name for t in tools]}")
-                                raise ValueError(f"Unknown tool: {func_name}")
-
-                            print(f"DEBUG: Found tool: {tool.name}")
-                            print(f"DEBUG: Tool schema: {tool.inputSchema}")
-
-                            # Prepare arguments according to the tool's input schema
-                            arguments = {}
-                            schema_properties = tool.inputSchema.get('properties', {})
-                            print(f"DEBUG: Schema properties: {schema_properties}")
-
-                            for param_name, param_info in schema_properties.items():
-                                if not params:  # Check if we have enough parameters
-                                    raise ValueError(f"Not enough parameters provided for {func_name}")
-                                    
-                                value = params.pop(0)  # Get and remove the first parameter
-                                param_type = param_info.get('type', 'string')
-                                
-                                print(f"DEBUG: Converting parameter {param_name} with value {value} to type {param_type}")
-                                
-                                # Convert the value to the correct type based on the schema
-                                if param_type == 'integer':
-                                    arguments[param_name] = int(value)
-                                elif param_type == 'number':
-                                    arguments[param_name] = float(value)
-                                elif param_type == 'array':
-                                    # Handle array input
-                                    if isinstance(value, str):
-                                        value = value.strip('[]').split(',')
-                                    arguments[param_name] = [int(x.strip()) for x in value]
-                                else:
-                                    # Join rest parameters if string may contain spaces or separators
-                                    if param_name == list(schema_properties.keys())[-1] and params:
-                                        value = "|".join([value] + params)
-                                        params = []
-                                    arguments[param_name] = str(value)
-
-                            print(f"DEBUG: Final arguments: {arguments}")
-                            print(f"DEBUG: Calling tool {func_name}")
-                            
-                            result = await session.call_tool(func_name, arguments=arguments)
-                            print(f"DEBUG: Raw result: {result}")
-                            
-                            # Get the full result content
-                            if hasattr(result, 'content'):
-                                print(f"DEBUG: Result has content attribute")
-                                # Handle multiple content items
-                                if isinstance(result.content, list):
-                                    iteration_result = [
-                                        item.text if hasattr(item, 'text') else str(item)
-                                        for item in result.content
-                                    ]
-                                else:
-                                    iteration_result = str(result.content)
-                            else:
-                                print(f"DEBUG: Result has no content attribute")
-                                iteration_result = str(result)
-                                
-                            print(f"DEBUG: Final iteration result: {iteration_result}")
-                            
-                            # Format the response based on result type
-                            if isinstance(iteration_result, list):
-                                result_str = f"[{', '.join(iteration_result)}]"
-                            else:
-                                result_str = str(iteration_result)
-                            
-                            iteration_response.append(
-                                f"In the {iteration + 1} iteration you called {func_name} with {arguments} parameters, "
-                                f"and the function returned {result_str}."
-                            )
-                            last_response = iteration_result
-
-                        except Exception as e:
-                            print(f"DEBUG: Error details: {str(e)}")
-                            print(f"DEBUG: Error type: {type(e)}")
-                            import traceback
-                            traceback.print_exc()
-                            iteration_response.append(f"Error in iteration {iteration + 1}: {str(e)}")
-                            break
-
-                    elif response_text.startswith("FINAL_ANSWER:"):
-                        print("\n=== Agent Execution Complete ===")
-                        break
-
-                    iteration += 1
 
-    except Exception as e:
-        print(f"Error in main execution: {e}")
-        import traceback
-        traceback.print_exc()
+# Tools named in the fixed part of the prompt are described even when the query
+# does not mention them
+PROMPT_WORDS = frozenset(re.findall(r"\w+", build_system_prompt("")))
+
+
+async def handle_server_message(message):
+    """Mark the tool catalog stale when the server says its tool list changed"""
+    if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+        log.info("Server tool list changed, refreshing catalog")
+        catalog.mark_stale()
+
+# Warm MCP sessions; attaches to a `functions.py serve` daemon when MCP_SERVER_URL is set
+pool = SessionPool(
+    url=os.getenv("MCP_SERVER_URL"),
+    size=int(os.getenv("MCP_POOL_SIZE", "2")),
+    message_handler=handle_server_message
+)
+
+class CanvasLease:
+    """Lets one run at a time use the serial (Paint) tools.
+
+    The server has a single Paint window and shape registry for all sessions,
+    so concurrent runs would draw into each other's canvas. A run takes the
+    lease before its first serial call and keeps it until it finishes; runs
+    that never call a serial tool never wait for it.
+    """
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.holder = None
+
+    async def acquire(self, run):
+        if self.holder is run:
+            return
+        await self.lock.acquire()
+        self.holder = run
+
+    def release(self, run):
+        if self.holder is run:
+            self.holder = None
+            self.lock.release()
+
+canvas_lease = CanvasLease()
+
+class AgentRun:
+    """State of one agent loop: its transcript, counters and timing.
+
+    Nothing here is shared between runs, so any number of AgentRun objects can
+    run concurrently on one event loop, sharing only the session pool, the tool
+    catalog, the result cache and (one run at a time) the canvas lease.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, query, reset_canvas=False):
+        self.run_id = next(AgentRun._ids)
+        self.query = query
+        # Close Paint when the run ends, so the next run starts on a blank canvas
+        self.reset_canvas = reset_canvas
+        self.transcript = Transcript(max_bytes=transcript_max_bytes)
+        self.iteration = 0
+        self.last_response = None
+        self.status = "pending"
+        self.trace = []
+        self.llm_calls = 0
+        self.tool_calls = 0
+        self.tool_errors = 0
+        self.llm_seconds = 0.0
+        self.tool_seconds = 0.0
+        self.started = None
+        self.finished = None
+        self.tool_k = tool_top_k
+        self.prompt_k = None
+        self.prompt_tools = 0
+
+    def log(self, message, *args, level=logging.INFO):
+        log.log(level, "[run %s] " + message, self.run_id, *args)
+
+    def build_prompt(self):
+        """System prompt describing the catalog tools selected for this run's query"""
+        names = catalog.select(self.query, self.tool_k, pinned=PROMPT_WORDS)
+        tools_description = catalog.describe(names)
+        self.prompt_k = self.tool_k
+        self.prompt_tools = len(names)
+        self.log(
+            "Prompt describes %d of %d tools (%d of %d chars)",
+            len(names), len(catalog.lines), len(tools_description), len(catalog.description)
+        )
+        self.log("Prompt tools: %s", names, level=logging.DEBUG)
+        return build_system_prompt(tools_description)
+
+    def widen_tools(self):
+        """Describe every tool from the next iteration on; False if already so"""
+        if self.prompt_tools >= len(catalog.lines):
+            return False
+        self.tool_k = 0
+        return True
+
+    def current_query(self):
+        if not len(self.transcript):
+            return self.query
+        # The transcript holds each call once and stays within its byte budget
+        return f"{self.query}\n\n{self.transcript.render()}  What should I do next?"
+
+    async def ask_llm(self, system_prompt):
+        """Response text for the current state of the run"""
+        prompt = f"{system_prompt}\n\nQuery: {self.current_query()}"
+        self.llm_calls += 1
+        llm_started = time.perf_counter()
+        try:
+            response = await generate_with_timeout(llm, prompt)
+        finally:
+            self.llm_seconds += time.perf_counter() - llm_started
+        return response.text.strip()
+
+    def record_steps(self, steps):
+        """Merge plan results into the transcript in order.
+
+        Every step that ran is recorded, also after one that failed: steps
+        that do not depend on it ran concurrently and may have had side
+        effects (an email sent) the model must not repeat.
+
+        Returns (failed, raised): whether the model has to be consulted again,
+        and whether that is because a call raised.
+        """
+        failed = raised = False
+        for step in steps:
+            self.trace.append({
+                "iteration": self.iteration + 1,
+                "tool": step.func_name,
+                "arguments": step.arguments,
+                "result": step.result_str,
+                "failed": step.failed,
+                "skipped": step.skipped,
+                "error": str(step.error) if step.error is not None else None,
+                "latency_ms": round(step.elapsed * 1000, 2),
+            })
+            if not step.skipped:
+                self.tool_calls += 1
+                self.tool_seconds += step.elapsed
+            if step.error is not None:
+                self.tool_errors += 1
+                self.log(
+                    "%s raised %s: %s", step.func_name, type(step.error).__name__, step.error,
+                    level=logging.ERROR
+                )
+                log.debug("Traceback", exc_info=step.error)
+                self.transcript.add_error(self.iteration + 1, str(step.error))
+                failed = True
+                if isinstance(step.error, UnknownToolError) and self.widen_tools():
+                    # The model wants a tool the prompt left out; ask again with all of them
+                    self.log("Widening the prompt to all tools", level=logging.WARNING)
+                else:
+                    raised = True
+                continue
+            if step.skipped:
+                # Never called: a step it depends on did not succeed
+                failed = True
+                continue
+
+            self.transcript.add_call(self.iteration + 1, step.func_name, step.arguments, step.result_str)
+            self.last_response = step.iteration_result
+            if step.failed:
+                self.tool_errors += 1
+                self.log("%s did not succeed, consulting the model again", step.func_name, level=logging.WARNING)
+                failed = True
+        return failed, raised
+
+    async def run(self, session):
+        """Run the agent loop until FINAL_ANSWER, an error or max_iterations"""
+        self.started = time.perf_counter()
+        self.status = "max_iterations"
+        system_prompt = self.build_prompt()
+        try:
+            while self.iteration < max_iterations:
+                self.log("--- Iteration %d ---", self.iteration + 1)
+                if catalog.stale:
+                    # The server changed its tool list since the prompt was built
+                    await catalog.refresh(session)
+                    result_cache.bind(catalog.fingerprint)
+                    system_prompt = self.build_prompt()
+                elif self.prompt_k != self.tool_k:
+                    system_prompt = self.build_prompt()
+
+                # Get model's response with timeout
+                try:
+                    response_text = await self.ask_llm(system_prompt)
+                    self.log("LLM Response: %s", response_text)
+                except Exception as e:
+                    self.log("Failed to get LLM response: %s", e, level=logging.ERROR)
+                    self.status = "llm_error"
+                    break
+
+                calls, finished = parse_response(response_text)
+                if not plan_mode:
+                    # Only the first FUNCTION_CALL line is executed per iteration
+                    calls = calls[:1]
+                    finished = finished and not calls
+                self.log("Parsed %d step(s), finished=%s", len(calls), finished, level=logging.DEBUG)
+
+                if any(func_name in catalog.serial_tools for func_name, _ in calls):
+                    await canvas_lease.acquire(self)
+
+                # Run the plan without waiting on the model; independent steps run
+                # concurrently and results are merged back in plan order
+                steps = await run_plan(
+                    calls,
+                    partial(execute_call, session, catalog),
+                    catalog.serial_tools
+                )
+                failed, raised = self.record_steps(steps)
+
+                if raised and not plan_mode:
+                    self.status = "tool_error"
+                    break
+                if finished and not failed:
+                    self.log("=== Agent Execution Complete ===")
+                    self.status = "done"
+                    break
+
+                self.iteration += 1
+        finally:
+            self.finished = time.perf_counter()
+            await self.release_canvas(session)
+        return self
+
+    async def release_canvas(self, session):
+        """Give up the canvas lease, closing Paint first if reset_canvas is set"""
+        if canvas_lease.holder is not self:
+            return
+        try:
+            if self.reset_canvas and "close_paint" in catalog.tools:
+                await session.call_tool("close_paint", arguments={})
+        except Exception as e:
+            self.log("Could not reset the canvas: %s", e, level=logging.WARNING)
+        finally:
+            canvas_lease.release(self)
+
+    def record(self):
+        """JSON-serializable summary of the run"""
+        total_seconds = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        return {
+            "run_id": self.run_id,
+            "query": self.query,
+            "status": self.status,
+            "iterations": min(self.iteration + 1, max_iterations),
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+            "tool_errors": self.tool_errors,
+            "prompt_tools": self.prompt_tools,
+            "last_response": self.last_response,
+            "trace": self.trace,
+            "latency_ms": {
+                "total": round(total_seconds * 1000, 2),
+                "llm": round(self.llm_seconds * 1000, 2),
+                # Sum over steps; concurrent steps can make this exceed wall time
+                "tools": round(self.tool_seconds * 1000, 2),
+            },
+        }
+
+async def run_query(session, query, reset_canvas=False):
+    """Run the agent loop for one query and return its record"""
+    run = await AgentRun(query, reset_canvas).run(session)
+    return run.record()
+
+async def setup():
+    """Connect the session pool and load the tool catalog"""
+    # Attach to the warm MCP session pool (daemon or stdio fallback)
+    log.info("Establishing connection to MCP server...")
+    await pool.start()
+
+    # Get available tools; the catalog reuses the cached description and
+    # argument converters when the server's tool list is unchanged
+    log.info("Requesting tool list...")
+    await catalog.refresh(pool, force=True)
+    log.info("Successfully retrieved %d tools", len(catalog.tools))
+    # Saved results only count for the tool list they were cached with
+    result_cache.bind(catalog.fingerprint)
+    result_cache.load()
+    return pool
+
+async def shutdown():
+    """Save the result cache and close pooled connections"""
+    log.info("Tool result cache: %s", result_cache.stats())
+    result_cache.save()
+    await pool.aclose()
+    await llm.aclose()
+
+async def main():
+    setup_logging()
+    log.info("Starting main execution...")
+    try:
+        # Remove early-send; flow should be LLM -> MCP -> send_gmail tool
+
+        session = await setup()
+
+        # User task to execute via tools
+        default_to = os.getenv("GMAIL_TO", "recipient@example.com")
+        default_subject = os.getenv("GMAIL_SUBJECT", "Automation Notification")
+        default_body = os.getenv("GMAIL_BODY", "Triggered from talk2mcp.py via MCP")
+        query = f"Send an email using send_gmail to {default_to} with subject {default_subject} and body {default_body}."
+        log.info("Starting iteration loop...")
+        record = await run_query(session, query)
+        log.info("Run finished: status=%s latency=%s", record['status'], record['latency_ms'])
+
+    except Exception:
+        log.exception("Error in main execution")
     finally:
-        reset_state()  # Reset at the end of main
+        await shutdown()
 
 if __name__ == "__main__":
     asyncio.run(main())
-    
-    
\ No newline at end of file
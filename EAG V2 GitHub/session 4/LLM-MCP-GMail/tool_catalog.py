@@ -0,0 +1,238 @@
+"""Cached view of the MCP server's tool list for talk2mcp.
+
+The catalog keeps the rendered description line of every tool used in the
+system prompt and a precompiled argument converter per tool. Both are keyed by
+a hash of the server's tool list and stored on disk, so a warm start with an
+unchanged server skips rebuilding them. Within a session they are only
+refreshed after the server sends a tools/list_changed notification.
+
+select() picks the tools relevant to a query with a BM25 index (tool_index.py),
+so a prompt only has to describe those.
+"""
+import hashlib
+import json
+import logging
+import os
+
+from executor import is_serial_tool
+from result_cache import is_pure_tool
+from tool_index import ToolIndex
+
+log = logging.getLogger("talk2mcp.catalog")
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tool_catalog.json")
+# Number of tool-list versions kept in the cache file
+MAX_CACHED_VERSIONS = 8
+# Part of every cache key; bump it when the layout of a cache entry changes so
+# entries written by older code are simply missed
+CACHE_FORMAT = 2
+
+
+def tools_fingerprint(tools) -> str:
+    """Stable hash of the cache format and the names, descriptions and input schemas of tools"""
+    payload = [CACHE_FORMAT] + [
+        {
+            "name": tool.name,
+            "description": getattr(tool, 'description', None),
+            "inputSchema": tool.inputSchema,
+        }
+        for tool in tools
+    ]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class UnknownToolError(ValueError):
+    """A FUNCTION_CALL named a tool the server does not have"""
+
+
+def render_tool_line(tool) -> str:
+    """One-line description of a tool for the system prompt"""
+    try:
+        # Get tool properties
+        params = tool.inputSchema
+        desc = getattr(tool, 'description', 'No description available')
+
+        # Format the input schema in a more readable way
+        if 'properties' in params:
+            param_details = []
+            required = params.get('required', params['properties'])
+            for param_name, param_info in params['properties'].items():
+                param_type = param_info.get('type', 'unknown')
+                optional = '' if param_name in required else ' (optional)'
+                param_details.append(f"{param_name}: {param_type}{optional}")
+            params_str = ', '.join(param_details)
+        else:
+            params_str = 'no parameters'
+
+        return f"{tool.name}({params_str}) - {desc}"
+    except Exception as e:
+        log.warning("Error processing tool %s: %s", getattr(tool, 'name', '?'), e)
+        return "Error processing tool"
+
+
+def render_tools_description(lines) -> str:
+    """Numbered tool lines for the system prompt"""
+    return "\n".join(f"{i+1}. {line}" for i, line in enumerate(lines))
+
+
+def tool_param_specs(tool):
+    """[(param_name, param_type, required), ...] in schema order"""
+    properties = tool.inputSchema.get('properties', {})
+    required = set(tool.inputSchema.get('required', properties))
+    return [[name, info.get('type', 'string'), name in required] for name, info in properties.items()]
+
+
+def _to_list(value):
+    # Handle array input; JSON first so batch tools can get nested lists and strings
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, list):
+            return parsed
+        value = value.strip('[]').split(',')
+    return [int(x.strip()) for x in value]
+
+
+_CONVERTERS = {
+    'integer': int,
+    'number': float,
+    'array': _to_list,
+}
+
+
+def compile_converter(func_name, specs):
+    """Build a function turning the raw FUNCTION_CALL params of a tool into its
+    arguments dict. The schema is walked once here instead of on every call."""
+    steps = []
+    for position, (param_name, param_type, is_required) in enumerate(specs):
+        is_last = position == len(specs) - 1
+        steps.append((param_name, _CONVERTERS.get(param_type), is_last, is_required))
+
+    def convert(params):
+        params = list(params)
+        arguments = {}
+        for param_name, converter, is_last, is_required in steps:
+            if not params:  # Check if we have enough parameters
+                if not is_required:
+                    break  # the server fills in defaults for the rest
+                raise ValueError(f"Not enough parameters provided for {func_name}")
+            value = params.pop(0)
+            if converter is not None:
+                arguments[param_name] = converter(value)
+            else:
+                # Join rest parameters if string may contain spaces or separators
+                if is_last and params:
+                    value = "|".join([value] + params)
+                    params = []
+                arguments[param_name] = str(value)
+        return arguments
+
+    return convert
+
+
+class ToolCatalog:
+    """Tools, prompt fragment and converters for one version of the server's tool list"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.fingerprint = None
+        self.tools = {}
+        self.description = ""
+        self.lines = {}
+        self.index = None
+        self.converters = {}
+        self.serial_tools = set()
+        self.pure_tools = set()
+        self.stale = True
+
+    def mark_stale(self):
+        """Called when the server reports that its tool list changed"""
+        self.stale = True
+
+    def _read_cache(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, cache):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning("Could not write tool catalog cache: %s", e)
+
+    def load(self, tools):
+        """Use the cached entry for this tool list, building and saving it on a miss"""
+        fingerprint = tools_fingerprint(tools)
+        self.tools = {tool.name: tool for tool in tools}
+        self.serial_tools = {tool.name for tool in tools if is_serial_tool(tool)}
+        self.pure_tools = {tool.name for tool in tools if is_pure_tool(tool)}
+        self.stale = False
+        if fingerprint == self.fingerprint:
+            return
+
+        cache = self._read_cache()
+        entry = cache.get(fingerprint)
+        if entry is None:
+            log.info("Tool catalog cache miss, rendering tools description")
+            lines = {tool.name: render_tool_line(tool) for tool in tools}
+            entry = {
+                "description": render_tools_description(lines.values()),
+                "lines": lines,
+                "specs": {tool.name: tool_param_specs(tool) for tool in tools},
+            }
+            cache.pop(fingerprint, None)
+            cache[fingerprint] = entry
+            while len(cache) > MAX_CACHED_VERSIONS:
+                cache.pop(next(iter(cache)))
+            self._write_cache(cache)
+        else:
+            log.info("Tool catalog cache hit")
+
+        self.fingerprint = fingerprint
+        self.description = entry["description"]
+        self.lines = entry["lines"]
+        self.index = ToolIndex(tools)
+        self.converters = {
+            name: compile_converter(name, specs) for name, specs in entry["specs"].items()
+        }
+
+    async def refresh(self, session, force=False):
+        """Re-list the server's tools if the catalog is stale (or force is set)"""
+        if self.stale or force:
+            tools_result = await session.list_tools()
+            self.load(tools_result.tools)
+        return self
+
+    def select(self, query, k, pinned=()):
+        """Names of the tools to describe for query, in server order: the k best
+        BM25 matches plus any tool named in pinned. Every tool when k is 0 or
+        nothing matches."""
+        if k <= 0 or k >= len(self.lines) or self.index is None:
+            return list(self.lines)
+        chosen = set(self.index.search(query, k))
+        if not chosen:
+            return list(self.lines)
+        chosen.update(pinned)
+        return [name for name in self.lines if name in chosen]
+
+    def describe(self, names):
+        """Numbered description of the named tools for the system prompt"""
+        if len(names) == len(self.lines):
+            return self.description
+        return render_tools_description(self.lines[name] for name in names)
+
+    def convert(self, func_name, params):
+        """Arguments dict for a FUNCTION_CALL of func_name"""
+        converter = self.converters.get(func_name)
+        if converter is None:
+            log.debug("Available tools: %s", list(self.tools))
+            raise UnknownToolError(f"Unknown tool: {func_name}")
+        return converter(params)
@@ -0,0 +1,123 @@
+"""Vectorized list reductions for the math tools.
+
+Each function takes a whole batch (a list of lists, or several strings) and
+reduces it in one pass over a NumPy array. Sums of floats use math.fsum and
+sums of exponentials are done in log space, so large inputs give a result
+(possibly inf) instead of an OverflowError. Without NumPy the same functions
+fall back to plain Python with the same results.
+"""
+import math
+
+_numpy = None
+
+
+def _np():
+    """NumPy, imported on first use (None if it is not installed)"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:  # optional; everything below also works without it
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+# Sums of int64 values stay exact as long as no partial sum can pass this
+INT64_SAFE = 2 ** 63 - 1
+
+
+def _flatten(lists):
+    """Concatenated values and the start offset of each list"""
+    values = []
+    offsets = []
+    for items in lists:
+        offsets.append(len(values))
+        values.extend(items)
+    return values, offsets
+
+
+def _reduce_lists(np, ufunc, array, offsets, ends, empty):
+    """ufunc.reduceat over each list of the flattened array; empty lists get `empty`.
+
+    reduceat needs a non-empty slice at every start, so it only gets the starts
+    of non-empty lists (empty ones add no values in between) and its results
+    are scattered back into place.
+    """
+    offsets = np.asarray(offsets, dtype=np.intp)
+    filled = np.asarray(ends, dtype=np.intp) > offsets
+    results = np.full(len(offsets), empty, dtype=array.dtype)
+    results[filled] = ufunc.reduceat(array, offsets[filled])
+    return results
+
+
+def _int_sums(lists):
+    """Exact sums of lists of ints"""
+    values, offsets = _flatten(lists)
+    np = _np()
+    if np is None or not values or max(map(abs, values)) * len(values) > INT64_SAFE:
+        # Python ints never overflow; NumPy's int64 would
+        return [sum(items) for items in lists]
+    array = np.asarray(values, dtype=np.int64)
+    ends = offsets[1:] + [len(values)]
+    return [int(s) for s in _reduce_lists(np, np.add, array, offsets, ends, 0)]
+
+
+def sum_lists(lists: list) -> list:
+    """Sum of each list; exact for ints, correctly rounded (fsum) for floats"""
+    is_int = [all(type(v) is int for v in items) for items in lists]
+    int_sums = iter(_int_sums([items for items, flag in zip(lists, is_int) if flag]))
+    return [
+        next(int_sums) if flag else math.fsum(items)
+        for items, flag in zip(lists, is_int)
+    ]
+
+
+def log_sum_exp_lists(lists: list) -> list:
+    """log(sum(exp(x))) of each list, computed without overflow (-inf for an empty list)"""
+    values, offsets = _flatten(lists)
+    ends = offsets[1:] + [len(values)]
+    np = _np()
+    if np is None:
+        results = []
+        for start, end in zip(offsets, ends):
+            chunk = values[start:end]
+            if not chunk:
+                results.append(-math.inf)
+                continue
+            peak = max(chunk)
+            results.append(peak + math.log(math.fsum(math.exp(v - peak) for v in chunk)))
+        return results
+    if not values:
+        return [-math.inf] * len(lists)
+    array = np.asarray(values, dtype=np.float64)
+    lengths = np.asarray(ends) - np.asarray(offsets)
+    # Shift each list by its own maximum so the largest term is exp(0) = 1
+    peaks = _reduce_lists(np, np.maximum, array, offsets, ends, -math.inf)
+    shifted = np.exp(array - np.repeat(peaks, lengths))
+    sums = _reduce_lists(np, np.add, shifted, offsets, ends, 0.0)
+    # An empty list sums to 0, and its -inf peak plus log(0) stays -inf
+    with np.errstate(divide="ignore"):
+        return [float(r) for r in peaks + np.log(sums)]
+
+
+def exp_sum_lists(lists: list) -> list:
+    """sum(exp(x)) of each list; inf when the sum does not fit in a float"""
+    results = []
+    for lse in log_sum_exp_lists(lists):
+        try:
+            results.append(math.exp(lse))
+        except OverflowError:
+            results.append(math.inf)
+    return results
+
+
+def char_codes(strings: list) -> list:
+    """Unicode code point of every character, one list per string"""
+    np = _np()
+    if np is None:
+        return [list(map(ord, s)) for s in strings]
+    # UTF-32 stores each character as its code point, so one decode does the whole string
+    return [
+        np.frombuffer(s.encode("utf-32-le"), dtype="<u4").tolist()
+        for s in strings
+    ]
@@ -0,0 +1,194 @@
+"""Drawing surfaces behind the Paint tools in plugins/paint_tools.py.
+
+A Canvas takes the rectangle, text and color operations the tools need, in
+canvas pixel coordinates. WindowsPaintCanvas (in plugins/paint_tools.py)
+drives a live MS Paint window. PillowCanvas applies the same operations to an
+in-memory image and exports it as PNG, so the tools and the agent flows on top
+of them also run headless, e.g. on Linux workers. PAINT_BACKEND=windows|pillow
+picks one; the default is windows on Windows and pillow elsewhere.
+"""
+import io
+import os
+import sys
+from abc import ABC, abstractmethod
+
+BACKEND = os.getenv("PAINT_BACKEND", "windows" if sys.platform == "win32" else "pillow").lower()
+
+# Same size as the fixed Paint canvas rectangle on the 14" laptop
+CANVAS_SIZE = (1200, 555)
+TEXT_SIZE = 15
+LINE_WIDTH = 1
+# Text boxes keep this far from the canvas border, like Paint's own
+TEXT_PADDING = 4
+
+# Paint's default palette: lower-case name -> RGB
+PALETTE_RGB = {
+    "black": (0, 0, 0),
+    "gray-50%": (127, 127, 127),
+    "dark red": (136, 0, 21),
+    "red": (237, 28, 36),
+    "orange": (255, 127, 39),
+    "yellow": (255, 242, 0),
+    "green": (34, 177, 76),
+    "turquoise": (0, 162, 232),
+    "indigo": (63, 72, 204),
+    "purple": (163, 73, 164),
+    "white": (255, 255, 255),
+    "gray-25%": (195, 195, 195),
+    "brown": (185, 122, 87),
+    "rose": (255, 174, 201),
+    "gold": (255, 201, 14),
+    "light yellow": (239, 228, 176),
+    "lime": (181, 230, 29),
+    "light turquoise": (153, 217, 234),
+    "blue-gray": (112, 146, 190),
+    "lavender": (200, 191, 231),
+}
+
+
+class Canvas(ABC):
+    """Operations the Paint tools run on a drawing surface"""
+
+    name = "canvas"
+
+    @property
+    @abstractmethod
+    def is_open(self):
+        """Whether open() has been called"""
+
+    @abstractmethod
+    async def open(self):
+        """Start with a new, blank canvas; returns a status message"""
+
+    async def prepare(self, op, focus_wait=0.2):
+        """Get ready for a batch of operations; op names the calling tool"""
+
+    async def select_tool(self, tool, wait=0.3):
+        """Make "rectangle" or "text" the current tool"""
+
+    @abstractmethod
+    async def select_color(self, color):
+        """Make color the drawing color; False if it is not available"""
+
+    @abstractmethod
+    async def rectangle(self, x1, y1, x2, y2):
+        """Draw a rectangle; returns it as (left, top, right, bottom)"""
+
+    @abstractmethod
+    async def text_in_box(self, box, text):
+        """Put text in a text box spanning box = (left, top, right, bottom)"""
+
+    @abstractmethod
+    async def text_at(self, x, y, text):
+        """Put text with its top-left corner at (x, y)"""
+
+    @abstractmethod
+    def export_png(self):
+        """PNG bytes of the current canvas"""
+
+    @abstractmethod
+    async def close(self):
+        """Discard the canvas and its drawing; returns a status message"""
+
+
+def _clamp(value, low, high):
+    return max(low, min(value, high))
+
+
+class PillowCanvas(Canvas):
+    """Offscreen canvas: the Paint operations drawn onto a Pillow image"""
+
+    name = "pillow"
+
+    def __init__(self, size=CANVAS_SIZE, background="white"):
+        self.size = size
+        self.background = background
+        self.image = None
+        self.draw = None
+        self.color = PALETTE_RGB["black"]
+        self.font = None
+
+    @property
+    def is_open(self):
+        return self.image is not None
+
+    async def open(self):
+        # Pillow is imported here so loading the plugin stays cheap
+        from PIL import Image, ImageDraw, ImageFont
+
+        self.image = Image.new("RGB", self.size, self.background)
+        self.draw = ImageDraw.Draw(self.image)
+        self.color = PALETTE_RGB["black"]
+        if self.font is None:
+            try:
+                self.font = ImageFont.load_default(size=TEXT_SIZE)
+            except TypeError:  # Pillow < 10.1 has a single bitmap font
+                self.font = ImageFont.load_default()
+        return f"Blank {self.size[0]}x{self.size[1]} canvas opened (headless)"
+
+    async def select_color(self, color):
+        from PIL import ImageColor
+
+        name = color.strip().lower()
+        if name in PALETTE_RGB:
+            self.color = PALETTE_RGB[name]
+            return True
+        try:
+            self.color = ImageColor.getrgb(name)
+        except ValueError:
+            return False
+        return True
+
+    async def rectangle(self, x1, y1, x2, y2):
+        width, height = self.size
+        tlx, tly = min(x1, x2), min(y1, y2)
+        brx, bry = max(x1, x2), max(y1, y2)
+        # Same 2 pixel clamp as dragging inside the Paint canvas
+        self.draw.rectangle(
+            (
+                _clamp(tlx, 2, width - 2), _clamp(tly, 2, height - 2),
+                _clamp(brx, 2, width - 2), _clamp(bry, 2, height - 2),
+            ),
+            outline=self.color,
+            width=LINE_WIDTH,
+        )
+        return tlx, tly, brx, bry
+
+    def _wrap(self, text, max_width):
+        lines = []
+        for paragraph in str(text).splitlines() or [""]:
+            line = ""
+            for word in paragraph.split(" "):
+                candidate = f"{line} {word}" if line else word
+                if line and self.draw.textlength(candidate, font=self.font) > max_width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return "\n".join(lines)
+
+    async def text_in_box(self, box, text):
+        width, height = self.size
+        left, top, right, bottom = box
+        left = _clamp(left, TEXT_PADDING, width - 2 * TEXT_PADDING)
+        top = _clamp(top, TEXT_PADDING, height - 2 * TEXT_PADDING)
+        right = _clamp(right, left + 10, width - TEXT_PADDING)
+        # Like Paint, long text wraps at the box's right edge
+        self.draw.multiline_text(
+            (left, top), self._wrap(text, right - left), fill=self.color, font=self.font
+        )
+
+    async def text_at(self, x, y, text):
+        width, height = self.size
+        await self.text_in_box((x, y, width - TEXT_PADDING, height - TEXT_PADDING), text)
+
+    def export_png(self):
+        buffer = io.BytesIO()
+        # Fast compression: exports are frequent and the images are mostly flat
+        self.image.save(buffer, format="PNG", compress_level=1)
+        return buffer.getvalue()
+
+    async def close(self):
+        self.image = self.draw = None
+        return "Headless canvas closed"
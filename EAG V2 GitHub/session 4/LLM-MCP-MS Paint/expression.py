@@ -0,0 +1,298 @@
+"""Arithmetic expressions for the evaluate tool in plugins/math_tools.py.
+
+An expression is either a string such as "(2+3)*4^5 mod 7" or a JSON tree such
+as {"op": "multiply", "args": [{"op": "add", "args": [2, 3]}, 4]}. Both are
+parsed into a list of steps where identical subexpressions share one step, so
+each distinct subexpression is computed once. Operators are the same
+primitives the server exposes as tools (add, multiply, power, remainder, ...).
+"""
+import ast
+import json
+import math
+import re
+from functools import lru_cache
+
+from cpu_tools import (
+    ToolLimitError, check_digits, power_digits, factorial_digits, fibonacci_digits,
+    fibonacci_value, INLINE_DIGITS,
+)
+
+MAX_EXPRESSION_LENGTH = 10000
+MAX_STEPS = 1000
+
+LOG10_2 = math.log10(2)
+
+
+class NeedsWorker(Exception):
+    """Raised inline when a step is big enough to belong in a worker process"""
+
+
+# Cached across calls; the arguments are small ints even when the results are not
+@lru_cache(maxsize=128)
+def _power(a, b):
+    return a ** b
+
+
+@lru_cache(maxsize=128)
+def _factorial(a):
+    return math.factorial(a)
+
+
+@lru_cache(maxsize=128)
+def _fibonacci(n):
+    return fibonacci_value(n)
+
+
+def _int_digits(value):
+    return int(abs(value).bit_length() * LOG10_2) + 1
+
+
+def _check_size(name, digits, inline):
+    check_digits(f"evaluate ({name})", digits)
+    if inline and digits > INLINE_DIGITS:
+        raise NeedsWorker(name)
+
+
+def _both_int(a, b):
+    return type(a) is int and type(b) is int
+
+
+def _add(a, b, inline):
+    return a + b
+
+
+def _subtract(a, b, inline):
+    return a - b
+
+
+def _multiply(a, b, inline):
+    if _both_int(a, b):
+        _check_size("multiply", _int_digits(a) + _int_digits(b), inline)
+    return a * b
+
+
+def _divide(a, b, inline):
+    return a / b
+
+
+def _floor_divide(a, b, inline):
+    return a // b
+
+
+def _remainder(a, b, inline):
+    return a % b
+
+
+def _real(result):
+    # float ** float gives a complex number for a negative base
+    if isinstance(result, complex):
+        raise ValueError("power of a negative number to a fractional exponent")
+    return result
+
+
+def _power_op(a, b, inline):
+    if _both_int(a, b):
+        _check_size("power", power_digits(a, b), inline)
+        return _power(a, b)
+    return _real(float(a) ** b)
+
+
+def _powmod(a, b, m, inline):
+    # pow(a, b, m) never builds a ** b, so "a^b mod m" works for any size of b
+    if _both_int(a, b) and type(m) is int and b >= 0 and m != 0:
+        return pow(a, b, m)
+    return _remainder(_power_op(a, b, inline), m, inline)
+
+
+def _negate(a, inline):
+    return -a
+
+
+def _factorial_op(a, inline):
+    if type(a) is not int or a < 0:
+        raise ValueError("factorial needs a non-negative integer")
+    _check_size("factorial", factorial_digits(a), inline)
+    return _factorial(a)
+
+
+def _fibonacci_op(n, inline):
+    if type(n) is not int or n < 0:
+        raise ValueError("fibonacci needs a non-negative integer")
+    _check_size("fibonacci", fibonacci_digits(n), inline)
+    return _fibonacci(n)
+
+
+def _float_op(fn):
+    return lambda a, inline: float(fn(a))
+
+
+# name -> (number of arguments, implementation)
+OPERATIONS = {
+    "add": (2, _add),
+    "subtract": (2, _subtract),
+    "multiply": (2, _multiply),
+    "divide": (2, _divide),
+    "floor_divide": (2, _floor_divide),
+    "remainder": (2, _remainder),
+    "power": (2, _power_op),
+    "powmod": (3, _powmod),
+    "negate": (1, _negate),
+    "sqrt": (1, _float_op(lambda a: _real(a ** 0.5))),
+    "cbrt": (1, _float_op(lambda a: _real(a ** (1 / 3)))),
+    "log": (1, _float_op(math.log)),
+    "sin": (1, _float_op(math.sin)),
+    "cos": (1, _float_op(math.cos)),
+    "tan": (1, _float_op(math.tan)),
+    "factorial": (1, _factorial_op),
+    "fibonacci": (1, _fibonacci_op),
+}
+COMMUTATIVE = {"add", "multiply"}
+
+_BINARY_OPS = {
+    ast.Add: "add",
+    ast.Sub: "subtract",
+    ast.Mult: "multiply",
+    ast.Div: "divide",
+    ast.FloorDiv: "floor_divide",
+    ast.Mod: "remainder",
+    ast.Pow: "power",
+}
+
+
+class Plan:
+    """Steps of one expression, each distinct subexpression stored once.
+
+    A step is ("num", value) or (op, arg_step, ...); arguments always refer to
+    earlier steps, so evaluating the list in order is a bottom-up pass.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self._ids = {}
+        self.reused = 0
+
+    def add(self, op, *args):
+        if op != "num" and op in COMMUTATIVE:
+            args = tuple(sorted(args))
+        # type() keeps 1 and 1.0 apart, which hash the same
+        key = (op, type(args[0]), args[0]) if op == "num" else (op,) + args
+        step = self._ids.get(key)
+        if step is not None:
+            if op != "num":
+                self.reused += 1
+            return step
+        if len(self.steps) >= MAX_STEPS:
+            raise ToolLimitError(f"evaluate accepts at most {MAX_STEPS} distinct steps")
+        self.steps.append((op,) + args)
+        self._ids[key] = len(self.steps) - 1
+        return len(self.steps) - 1
+
+    def number(self, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Not a number: {value!r}")
+        return self.add("num", value)
+
+    def operation(self, op, args):
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {op}")
+        arity = OPERATIONS[op][0]
+        if len(args) != arity:
+            raise ValueError(f"{op} takes {arity} argument(s), got {len(args)}")
+        steps = self.steps
+        if op == "negate" and steps[args[0]][0] == "num":
+            # Fold literal negative numbers straight into a constant
+            return self.number(-steps[args[0]][1])
+        if op == "remainder" and steps[args[0]][0] == "power":
+            # a ** b % m -> pow(a, b, m)
+            base, exponent = steps[args[0]][1:]
+            return self.add("powmod", base, exponent, args[1])
+        return self.add(op, *args)
+
+    def compact(self, root):
+        """Steps needed for root only, renumbered, with root last"""
+        needed = set()
+        pending = [root]
+        while pending:
+            step = pending.pop()
+            if step not in needed:
+                needed.add(step)
+                if self.steps[step][0] != "num":
+                    pending.extend(self.steps[step][1:])
+        order = sorted(needed)
+        renumber = {old: new for new, old in enumerate(order)}
+        return [
+            step if step[0] == "num" else (step[0],) + tuple(renumber[arg] for arg in step[1:])
+            for step in (self.steps[old] for old in order)
+        ]
+
+
+def _from_ast(plan, node):
+    if isinstance(node, ast.Constant):
+        return plan.number(node.value)
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        return plan.operation(
+            _BINARY_OPS[type(node.op)],
+            [_from_ast(plan, node.left), _from_ast(plan, node.right)]
+        )
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _from_ast(plan, node.operand)
+        return plan.operation("negate", [operand]) if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        return plan.operation(node.func.id, [_from_ast(plan, arg) for arg in node.args])
+    raise ValueError(f"Unsupported expression: {ast.unparse(node)}")
+
+
+def _from_tree(plan, node):
+    if isinstance(node, dict):
+        if "op" not in node:
+            raise ValueError(f"Expression node without op: {node}")
+        return plan.operation(node["op"], [_from_tree(plan, arg) for arg in node.get("args", [])])
+    if isinstance(node, list) and node and isinstance(node[0], str):
+        # ["op", arg, ...] shorthand
+        return plan.operation(node[0], [_from_tree(plan, arg) for arg in node[1:]])
+    return plan.number(node)
+
+
+def _build(plan, expression):
+    if not isinstance(expression, str):
+        return _from_tree(plan, expression)
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ToolLimitError(f"evaluate accepts at most {MAX_EXPRESSION_LENGTH} characters")
+    text = expression.strip()
+    if text[:1] in "{[":
+        return _from_tree(plan, json.loads(text))
+    # Accept the usual math notation as well as Python's
+    text = re.sub(r"\bmod\b", "%", text).replace("^", "**")
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+    return _from_ast(plan, tree.body)
+
+
+def parse(expression):
+    """(steps, reused) for an expression string or JSON tree; the last step is the result"""
+    plan = Plan()
+    try:
+        root = _build(plan, expression)
+    except RecursionError:
+        raise ValueError("Expression is nested too deeply")
+    return plan.compact(root), plan.reused
+
+
+def run_steps(steps, inline=False):
+    """Evaluate steps in order and return the value of the last one"""
+    values = []
+    for step in steps:
+        op = step[0]
+        if op == "num":
+            values.append(step[1])
+            continue
+        fn = OPERATIONS[op][1]
+        try:
+            values.append(fn(*(values[arg] for arg in step[1:]), inline))
+        except (ZeroDivisionError, OverflowError, ValueError, TypeError) as e:
+            if isinstance(e, ToolLimitError):
+                raise
+            raise ValueError(f"{op} failed: {e}")
+    return values[-1]
@@ -0,0 +1,79 @@
+"""Queue-based logging shared by functions.py and talk2mcp.
+
+Loggers render the message and put the record on an in-memory queue; a
+background thread formats it and writes it to stderr (or LOG_FILE). Nothing is written to stdout,
+which the stdio transport uses for protocol messages.
+
+    LOG_LEVEL=DEBUG     show tool calls and raw results (default INFO)
+    LOG_FILE=run.log    write to a file instead of stderr
+    LOG_FORMAT=json     one JSON object per line
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The message is rendered here, as the stock prepare() does, so arguments
+    # the caller changes afterwards (or objects that are not thread-safe) never
+    # reach the listener thread. Unlike the stock one it leaves the timestamp,
+    # layout and traceback text to the listener.
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level=None, log_file=None, fmt=None):
+    """Send all logging through a queue to stderr or a file; safe to call twice"""
+    global _listener
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_file = log_file or os.getenv("LOG_FILE")
+    fmt = fmt or os.getenv("LOG_FORMAT", "text")
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        return _listener
+
+    if log_file:
+        output = logging.FileHandler(log_file, encoding="utf-8")
+    else:
+        output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    records = queue.SimpleQueue()
+    # Replace handlers installed earlier (e.g. by FastMCP) so every record goes via the queue
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(records))
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # flush what is still queued on exit
+    return _listener
@@ -0,0 +1,237 @@
+"""Math tools: arithmetic, list reductions, Fibonacci numbers and evaluate."""
+import logging
+import math
+
+from cpu_tools import (
+    cpu_pool, check_digits, check_list_digits, check_length, power_digits, factorial_digits,
+    fibonacci_digits, fibonacci_sequence_digits, fibonacci_range_digits, fibonacci_page_size,
+    fibonacci_sequence, fibonacci_value, fibonacci_range,
+    json_int, INLINE_DIGITS, MAX_PAGE_SIZE, ToolLimitError,
+)
+from vector_tools import sum_lists, log_sum_exp_lists, exp_sum_lists, char_codes
+from expression import NeedsWorker, parse as parse_expression, run_steps
+from plugins import PURE_TOOL
+
+logger = logging.getLogger("functions.math")
+
+
+#addition tool
+def add(a: int, b: int) -> int:
+    """Add two numbers"""
+    logger.debug("CALLED: add(a: int, b: int) -> int:")
+    return int(a + b)
+
+def add_list(l: list) -> int:
+    """Add all numbers in a list"""
+    logger.debug("CALLED: add(l: list) -> int:")
+    check_length("add_list", len(l))
+    return sum_lists([l])[0]
+
+def add_lists(lists: list) -> list:
+    """Add up each list in a list of lists, e.g. [[1, 2], [3, 4]] -> [3, 7]"""
+    logger.debug("CALLED: add_lists(lists: list) -> list:")
+    check_length("add_lists", sum(map(len, lists)))
+    return sum_lists(lists)
+
+# subtraction tool
+def subtract(a: int, b: int) -> int:
+    """Subtract two numbers"""
+    logger.debug("CALLED: subtract(a: int, b: int) -> int:")
+    return int(a - b)
+
+# multiplication tool
+def multiply(a: int, b: int) -> int | str:
+    """Multiply two numbers"""
+    logger.debug("CALLED: multiply(a: int, b: int) -> int:")
+    return json_int(int(a * b))
+
+#  division tool
+def divide(a: int, b: int) -> float:
+    """Divide two numbers"""
+    logger.debug("CALLED: divide(a: int, b: int) -> float:")
+    return float(a / b)
+
+# power tool
+async def power(a: int, b: int) -> int | str:
+    """Power of two numbers (as a string when it has more than 4300 digits)"""
+    logger.debug("CALLED: power(a: int, b: int) -> int:")
+    digits = power_digits(a, b)
+    check_digits("power", digits)
+    if digits <= INLINE_DIGITS:
+        return int(a ** b)
+    return json_int(int(await cpu_pool.run("power", pow, a, b)))
+
+# square root tool
+def sqrt(a: int) -> float:
+    """Square root of a number"""
+    logger.debug("CALLED: sqrt(a: int) -> float:")
+    return float(a ** 0.5)
+
+# cube root tool
+def cbrt(a: int) -> float:
+    """Cube root of a number"""
+    logger.debug("CALLED: cbrt(a: int) -> float:")
+    return float(a ** (1/3))
+
+# factorial tool
+async def factorial(a: int) -> int | str:
+    """factorial of a number (as a string when it has more than 4300 digits)"""
+    logger.debug("CALLED: factorial(a: int) -> int:")
+    digits = factorial_digits(a)
+    check_digits("factorial", digits)
+    if digits <= INLINE_DIGITS:
+        return int(math.factorial(a))
+    return json_int(int(await cpu_pool.run("factorial", math.factorial, a)))
+
+# log tool
+def log(a: int) -> float:
+    """log of a number"""
+    logger.debug("CALLED: log(a: int) -> float:")
+    return float(math.log(a))
+
+# remainder tool
+def remainder(a: int, b: int) -> int:
+    """remainder of two numbers divison"""
+    logger.debug("CALLED: remainder(a: int, b: int) -> int:")
+    return int(a % b)
+
+# sin tool
+def sin(a: int) -> float:
+    """sin of a number"""
+    logger.debug("CALLED: sin(a: int) -> float:")
+    return float(math.sin(a))
+
+# cos tool
+def cos(a: int) -> float:
+    """cos of a number"""
+    logger.debug("CALLED: cos(a: int) -> float:")
+    return float(math.cos(a))
+
+# tan tool
+def tan(a: int) -> float:
+    """tan of a number"""
+    logger.debug("CALLED: tan(a: int) -> float:")
+    return float(math.tan(a))
+
+# mine tool
+def mine(a: int, b: int) -> int:
+    """special mining tool"""
+    logger.debug("CALLED: mine(a: int, b: int) -> int:")
+    return int(a - b - b)
+
+# expression tool
+async def evaluate(expression: str) -> dict:
+    """Evaluate a whole arithmetic expression in one call, e.g. (2+3)*4^5 mod 7 or sqrt(16)+factorial(5).
+    Supports + - * / // % ^ mod and add, subtract, multiply, divide, power, remainder, sqrt, cbrt, log,
+    sin, cos, tan, factorial, fibonacci; a JSON tree {"op": "add", "args": [1, 2]} also works"""
+    logger.debug("CALLED: evaluate(expression: str) -> dict:")
+    steps, reused = parse_expression(expression)
+    try:
+        result = run_steps(steps, inline=True)
+    except NeedsWorker:
+        # A big power, factorial or product: redo the whole plan in a worker
+        result = await cpu_pool.run("evaluate", run_steps, steps)
+    return {
+        "result": json_int(result),
+        "operations": sum(1 for step in steps if step[0] != "num"),
+        "reused": reused,
+    }
+
+def strings_to_chars_to_int(string: str) -> list[int]:
+    """Return the ASCII values of the characters in a word"""
+    logger.debug("CALLED: strings_to_chars_to_int(string: str) -> list[int]:")
+    check_length("strings_to_chars_to_int", len(string))
+    return char_codes([string])[0]
+
+def strings_to_chars_to_ints(strings: list) -> list:
+    """Return the ASCII values of the characters of each word in a list of words"""
+    logger.debug("CALLED: strings_to_chars_to_ints(strings: list) -> list:")
+    check_length("strings_to_chars_to_ints", sum(map(len, strings)))
+    return char_codes(strings)
+
+def check_finite_sums(tool: str, sums: list) -> list:
+    """sums, or ToolLimitError if one overflowed a float (JSON has no inf)"""
+    if any(math.isinf(s) for s in sums):
+        raise ToolLimitError(
+            f"{tool}: the sum of exponentials is too large for a float; "
+            "use int_list_to_log_exponential_sum instead"
+        )
+    return sums
+
+def int_list_to_exponential_sum(int_list: list) -> float:
+    """Return sum of exponentials of numbers in a list (too large a sum is an error)"""
+    logger.debug("CALLED: int_list_to_exponential_sum(int_list: list) -> float:")
+    check_length("int_list_to_exponential_sum", len(int_list))
+    return check_finite_sums("int_list_to_exponential_sum", exp_sum_lists([int_list]))[0]
+
+def int_lists_to_exponential_sums(int_lists: list) -> list:
+    """Return the sum of exponentials of each list in a list of lists"""
+    logger.debug("CALLED: int_lists_to_exponential_sums(int_lists: list) -> list:")
+    check_length("int_lists_to_exponential_sums", sum(map(len, int_lists)))
+    return check_finite_sums("int_lists_to_exponential_sums", exp_sum_lists(int_lists))
+
+def int_list_to_log_exponential_sum(int_list: list) -> float:
+    """Return log(sum of exponentials) of numbers in a list; works for any size of numbers"""
+    logger.debug("CALLED: int_list_to_log_exponential_sum(int_list: list) -> float:")
+    check_length("int_list_to_log_exponential_sum", len(int_list))
+    if not int_list:
+        # log(0) would be -inf, which JSON cannot carry
+        raise ValueError("int_list must not be empty")
+    return log_sum_exp_lists([int_list])[0]
+
+async def fibonacci_numbers(n: int) -> list:
+    """Return the first n Fibonacci Numbers (use fibonacci_page for long sequences)"""
+    logger.debug("CALLED: fibonacci_numbers(n: int) -> list:")
+    check_length("fibonacci_numbers", n)
+    check_digits("fibonacci_numbers", fibonacci_digits(n - 1))
+    digits = fibonacci_sequence_digits(n)
+    check_list_digits("fibonacci_numbers", digits)
+    if digits <= INLINE_DIGITS:
+        return fibonacci_sequence(n)
+    values = await cpu_pool.run("fibonacci_numbers", fibonacci_sequence, n)
+    return [json_int(value) for value in values]
+
+async def fibonacci_nth(n: int) -> int | str:
+    """Return the n-th Fibonacci Number, F(0) = 0, F(1) = 1 (as a string when it has more than 4300 digits)"""
+    logger.debug("CALLED: fibonacci_nth(n: int) -> int:")
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    # Fast doubling needs O(log n) multiplications instead of n additions
+    digits = fibonacci_digits(n)
+    check_digits("fibonacci_nth", digits)
+    if digits <= INLINE_DIGITS:
+        return fibonacci_value(n)
+    return json_int(await cpu_pool.run("fibonacci_nth", fibonacci_value, n))
+
+async def fibonacci_page(offset: int, limit: int) -> dict:
+    """Return Fibonacci Numbers F(offset) .. F(offset+limit-1); pages of big numbers may be shorter
+    than limit, so pass next_offset to get the following page"""
+    logger.debug("CALLED: fibonacci_page(offset: int, limit: int) -> dict:")
+    if offset < 0 or limit < 1:
+        raise ValueError("offset must be >= 0 and limit >= 1")
+    # Shorten the page to what fits the digit limits rather than failing
+    limit = fibonacci_page_size(offset, min(limit, MAX_PAGE_SIZE))
+    if limit == 0:
+        check_digits("fibonacci_page", fibonacci_digits(offset))
+        check_list_digits("fibonacci_page", fibonacci_digits(offset))
+    digits = fibonacci_range_digits(offset, limit)
+    if digits <= INLINE_DIGITS:
+        values = fibonacci_range(offset, limit)
+    else:
+        values = await cpu_pool.run("fibonacci_page", fibonacci_range, offset, limit)
+    return {
+        "offset": offset,
+        "limit": limit,
+        "values": [json_int(value) for value in values],
+        "next_offset": offset + len(values),
+    }
+
+
+# Every math tool is pure, so clients may cache and reorder calls freely
+TOOLS = [(tool, PURE_TOOL) for tool in (
+    add, add_list, add_lists, subtract, multiply, divide, power, sqrt, cbrt,
+    factorial, log, remainder, sin, cos, tan, mine, evaluate,
+    strings_to_chars_to_int, strings_to_chars_to_ints, int_list_to_exponential_sum,
+    int_lists_to_exponential_sums, int_list_to_log_exponential_sum,
+    fibonacci_numbers, fibonacci_nth, fibonacci_page,
+)]
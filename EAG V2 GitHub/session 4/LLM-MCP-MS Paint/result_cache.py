@@ -0,0 +1,120 @@
+"""Client-side cache of results of pure MCP tools."""
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+log = logging.getLogger("talk2mcp.cache")
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tool_results.json")
+
+
+def is_pure_tool(tool) -> bool:
+    """True for tools the server marks as read-only, idempotent and closed-world"""
+    annotations = getattr(tool, 'annotations', None)
+    if annotations is None:
+        return False
+    return (
+        annotations.readOnlyHint is True
+        and annotations.idempotentHint is True
+        and annotations.openWorldHint is False
+    )
+
+
+class ResultCache:
+    """Bounded LRU cache with a TTL, keyed by (tool, normalized arguments).
+
+    Values are the (iteration_result, result_str) pair talk2mcp builds from a
+    tool result, so they can be saved to disk and reused by later runs. The
+    cache belongs to one tool catalog fingerprint (see bind): results of a
+    server whose tools changed are dropped, in memory and on disk.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600.0, path=CACHE_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()  # key -> (stored_at, value)
+        self.fingerprint = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(func_name, arguments) -> str:
+        # Sorted keys and compact separators give one key per distinct call
+        return func_name + ":" + json.dumps(arguments, sort_keys=True, separators=(",", ":"))
+
+    def get(self, func_name, arguments):
+        """Cached value for the call, or None"""
+        key = self.key(func_name, arguments)
+        entry = self.entries.get(key)
+        if entry is not None and time.time() - entry[0] <= self.ttl:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            del self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, func_name, arguments, value):
+        key = self.key(func_name, arguments)
+        self.entries[key] = (time.time(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def bind(self, fingerprint):
+        """Use the cache for the tool catalog with this fingerprint, dropping
+        results cached for any other one"""
+        if fingerprint == self.fingerprint:
+            return
+        if self.entries:
+            log.info("Tool catalog changed, dropping %d cached results", len(self.entries))
+        self.entries.clear()
+        self.fingerprint = fingerprint
+
+    def load(self):
+        """Load entries saved by an earlier run for the bound catalog, skipping
+        expired ones; a file saved for another catalog is deleted"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(saved, dict) or saved.get("fingerprint") != self.fingerprint:
+            log.info("Tool result cache file is for another tool catalog, deleting it")
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            return
+        now = time.time()
+        for key, stored_at, value in saved["entries"]:
+            if now - stored_at <= self.ttl:
+                self.entries[key] = (stored_at, tuple(value))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "fingerprint": self.fingerprint,
+                    "entries": [[key, stored_at, value] for key, (stored_at, value) in self.entries.items()],
+                }, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning("Could not write tool result cache: %s", e)
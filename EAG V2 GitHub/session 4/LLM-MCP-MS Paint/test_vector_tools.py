@@ -0,0 +1,51 @@
+"""The NumPy paths of vector_tools against the plain-Python fallback.
+
+Run with: python -m pytest test_vector_tools.py
+"""
+import math
+
+import pytest
+
+import vector_tools
+
+pytest.importorskip("numpy")
+
+# Empty lists at the start, in the middle and at the end of a batch
+BATCHES = [
+    [[1, 2, 3], []],
+    [[], [1, 2, 3]],
+    [[1, 2], [], [3, 4, 5]],
+    [[], [7], [], [], [-2, 2], []],
+    [[], []],
+    [[0.5, 1.5], [], [1000.0, 1000.0], [-3]],
+]
+
+
+def without_numpy(monkeypatch, fn, *args):
+    monkeypatch.setattr(vector_tools, "_numpy", False)
+    return fn(*args)
+
+
+def close(expected, actual):
+    return len(expected) == len(actual) and all(
+        a == b or math.isclose(a, b, rel_tol=1e-12) for a, b in zip(expected, actual)
+    )
+
+
+@pytest.mark.parametrize("lists", BATCHES)
+def test_sum_lists_matches_fallback(monkeypatch, lists):
+    vectorized = vector_tools.sum_lists(lists)
+    assert vectorized == without_numpy(monkeypatch, vector_tools.sum_lists, lists)
+    assert vectorized == [sum(items) for items in lists]
+
+
+@pytest.mark.parametrize("lists", BATCHES)
+def test_log_sum_exp_lists_matches_fallback(monkeypatch, lists):
+    vectorized = vector_tools.log_sum_exp_lists(lists)
+    fallback = without_numpy(monkeypatch, vector_tools.log_sum_exp_lists, lists)
+    assert close(fallback, vectorized)
+
+
+def test_trailing_empty_list_keeps_previous_sum():
+    assert vector_tools.sum_lists([[1, 2, 3], []]) == [6, 0]
+    assert math.isclose(vector_tools.log_sum_exp_lists([[1, 2, 3], []])[0], 3.40760596444438)
@@ -0,0 +1,122 @@
+"""Encoded, disk-cached thumbnails for the create_thumbnail tool.
+
+A thumbnail is stored under a hash of the source path, its mtime and size, the
+target dimensions and the output format. A repeat request for an unchanged
+image is answered from the cache without opening the image at all; editing
+the image changes its mtime or size and therefore its key.
+"""
+import glob
+import hashlib
+import io
+import logging
+import os
+
+log = logging.getLogger("functions.thumbnails")
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "thumbnails")
+
+# format name accepted from callers -> (Pillow format, MCP image format)
+FORMATS = {
+    "png": ("PNG", "png"),
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpeg"),
+    "jpg": ("JPEG", "jpeg"),
+}
+QUALITY = 80
+MAX_SIZE = 1024
+# Most files one bulk call will take
+MAX_BULK_FILES = int(os.getenv("MCP_MAX_BULK_FILES", "1000"))
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+
+
+def _output_format(fmt):
+    fmt = (fmt or "png").strip().lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported thumbnail format: {fmt} (use png, webp or jpeg)")
+    return FORMATS[fmt]
+
+
+def cache_key(image_path, width, height, fmt):
+    """Hex key identifying one thumbnail of one version of one file"""
+    path = os.path.abspath(image_path)
+    stat = os.stat(path)
+    pil_format, _ = _output_format(fmt)
+    identity = f"{path}|{stat.st_mtime_ns}|{stat.st_size}|{width}x{height}|{pil_format}|{QUALITY}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key, image_format):
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.{image_format}")
+
+
+def thumbnail_path(image_path, width=100, height=100, fmt="png"):
+    """Cache file for the current version of image_path (which may not exist yet)"""
+    _, image_format = _output_format(fmt)
+    return _cache_path(cache_key(image_path, width, height, fmt), image_format)
+
+
+def find_images(pattern):
+    """Image files in a directory, or matching a glob such as photos/**/*.jpg"""
+    if os.path.isdir(pattern):
+        paths = [entry.path for entry in os.scandir(pattern) if entry.is_file()]
+    else:
+        paths = [path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path)]
+    paths = sorted(path for path in paths if os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS)
+    if len(paths) > MAX_BULK_FILES:
+        raise ValueError(f"{pattern} matches {len(paths)} images; at most {MAX_BULK_FILES} per call")
+    return paths
+
+
+def _encode(image_path, width, height, pil_format):
+    # Pillow is imported here so cache hits and server startup never load it
+    from PIL import Image as PILImage
+
+    with PILImage.open(image_path) as img:
+        # Let JPEG decode straight at 1/2, 1/4 or 1/8 scale instead of full size;
+        # twice the target keeps enough detail for the final resample
+        img.draft(None, (width * 2, height * 2))
+        img.thumbnail((width, height), reducing_gap=2.0)
+        if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            img = img.convert("RGBA")
+        buffer = io.BytesIO()
+        if pil_format == "PNG":
+            img.save(buffer, format="PNG", optimize=True)
+        else:
+            img.save(buffer, format=pil_format, quality=QUALITY)
+        return buffer.getvalue()
+
+
+def make_thumbnail(image_path, width=100, height=100, fmt="png"):
+    """(encoded bytes, image format, cache hit) for a thumbnail fitting width x height"""
+    if not (0 < width <= MAX_SIZE and 0 < height <= MAX_SIZE):
+        raise ValueError(f"Thumbnail size must be between 1 and {MAX_SIZE} pixels")
+    pil_format, image_format = _output_format(fmt)
+    path = thumbnail_path(image_path, width, height, fmt)
+    try:
+        with open(path, "rb") as f:
+            return f.read(), image_format, True
+    except OSError:
+        pass
+
+    data = _encode(image_path, width, height, pil_format)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning("Could not write thumbnail cache: %s", e)
+    return data, image_format, False
+
+
+def cache_thumbnail(image_path, width=100, height=100, fmt="png"):
+    """Make sure the thumbnail is cached; returns (cache path, size in bytes).
+
+    Used by the bulk tool in worker processes, so only the path travels back.
+    """
+    data, _, _ = make_thumbnail(image_path, width, height, fmt)
+    return thumbnail_path(image_path, width, height, fmt), len(data)
@@ -0,0 +1,77 @@
+"""BM25 search over the server's tools for talk2mcp.
+
+Each tool is indexed by its name, description and parameter names. The agent
+puts only the best matches for a query into the system prompt instead of every
+tool the server has, which keeps each prompt (and each LLM call) small.
+"""
+import math
+import re
+from collections import Counter
+
+# BM25 parameters: term frequency saturation and document length normalisation
+K1 = 1.2
+B = 0.75
+# Name words count this many times, since they describe the tool most directly
+NAME_WEIGHT = 3
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Words too common in queries and tool docs to tell tools apart
+STOPWORDS = frozenset(
+    "a an and are as at be by for from i in is it of on or the this to with"
+    " what which using use call return returns number numbers".split()
+)
+
+
+def tokenize(text):
+    """Lower-case words of text, with snake_case split, a plural "s" removed and
+    stopwords and single letters dropped"""
+    words = _WORD.findall((text or "").lower().replace("_", " "))
+    words = [word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+             for word in words]
+    return [word for word in words if len(word) > 1 and word not in STOPWORDS]
+
+
+def tool_terms(tool):
+    """Index terms for one tool"""
+    properties = (tool.inputSchema or {}).get("properties", {})
+    return (
+        tokenize(tool.name) * NAME_WEIGHT
+        + tokenize(getattr(tool, "description", None))
+        + tokenize(" ".join(properties))
+    )
+
+
+class ToolIndex:
+    """Ranks tools by BM25 score against a query"""
+
+    def __init__(self, tools):
+        self.names = [tool.name for tool in tools]
+        self.counts = [Counter(tool_terms(tool)) for tool in tools]
+        lengths = [sum(counts.values()) for counts in self.counts]
+        self.avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        self.norms = [K1 * (1 - B + B * length / (self.avg_length or 1)) for length in lengths]
+        documents = Counter(term for counts in self.counts for term in counts)
+        total = len(tools)
+        self.idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in documents.items()
+        }
+
+    def scores(self, query):
+        """{tool name: score} for every tool matching at least one query term"""
+        terms = set(tokenize(query)) & self.idf.keys()
+        scores = {}
+        for name, counts, norm in zip(self.names, self.counts, self.norms):
+            score = 0.0
+            for term in terms:
+                tf = counts.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (K1 + 1) / (tf + norm)
+            if score > 0:
+                scores[name] = score
+        return scores
+
+    def search(self, query, k):
+        """Names of the k best matching tools, best first; ties keep server order"""
+        scores = self.scores(query)
+        ranked = sorted(scores, key=lambda name: -scores[name])
+        return ranked[:k]
@@ -0,0 +1,110 @@
+"""Waits on UI readiness conditions for plugins/paint_tools.py.
+
+The Paint tools used to sleep a fixed time after every focus change, tool
+selection, click and paste. waiter.until() instead polls a condition (window
+focused, text box present, text pasted, ...) with a growing delay and returns
+as soon as it holds. By default it gives up after the old fixed time, so a
+wait is never slower than the sleep it replaces. Each wait point records how
+long it waited against that fixed sleep; the totals are served as
+metrics://waits.
+
+A condition returns a truthy value when the UI is ready, False while it is
+not, and None when readiness cannot be observed (e.g. a toolbar button that
+was not found); the wait then sleeps out the old fixed time.
+"""
+import asyncio
+import logging
+import time
+
+log = logging.getLogger("functions.paint")
+
+# Polling delay: starts small and grows by BACKOFF up to MAX_DELAY
+FIRST_DELAY = 0.005
+MAX_DELAY = 0.05
+BACKOFF = 1.5
+
+
+class _WaitStats:
+    def __init__(self):
+        self.calls = 0
+        self.timeouts = 0
+        self.unobserved = 0
+        self.waited = 0.0
+        self.fixed = 0.0
+
+
+class Waiter:
+    """Condition polling with per wait point statistics"""
+
+    def __init__(self):
+        self.points = {}
+
+    def _record(self, name, waited, fixed, timed_out, unobserved):
+        stats = self.points.get(name)
+        if stats is None:
+            stats = self.points[name] = _WaitStats()
+        stats.calls += 1
+        stats.timeouts += int(timed_out)
+        stats.unobserved += int(unobserved)
+        stats.waited += waited
+        stats.fixed += fixed
+        log.debug(
+            "wait %s: %.0f ms instead of %.0f ms (saved %.0f ms)%s",
+            name, waited * 1000, fixed * 1000, (fixed - waited) * 1000,
+            " TIMEOUT" if timed_out else ""
+        )
+
+    def _check(self, condition):
+        try:
+            return condition()
+        except Exception as e:
+            log.debug("Wait condition raised %s: %s", type(e).__name__, e)
+            return False
+
+    async def until(self, name, condition, fixed, timeout=None):
+        """Wait until condition() holds; fixed is the sleep this wait replaces
+        and the default timeout.
+
+        Returns True when the condition held, False on timeout or when it
+        could not be observed.
+        """
+        started = time.perf_counter()
+        deadline = started + (fixed if timeout is None else timeout)
+        delay = FIRST_DELAY
+        while True:
+            ready = self._check(condition) if condition is not None else None
+            now = time.perf_counter()
+            if ready is None:
+                # Nothing to observe: keep the old fixed sleep
+                await asyncio.sleep(max(0.0, fixed - (now - started)))
+                self._record(name, time.perf_counter() - started, fixed, False, True)
+                return False
+            if ready:
+                self._record(name, now - started, fixed, False, False)
+                return True
+            if now >= deadline:
+                self._record(name, now - started, fixed, True, False)
+                return False
+            await asyncio.sleep(min(delay, deadline - now))
+            delay = min(delay * BACKOFF, MAX_DELAY)
+
+    def snapshot(self):
+        """Dict of per wait point stats, with times in milliseconds"""
+        points = {}
+        saved = 0.0
+        for name, stats in sorted(self.points.items()):
+            saved += stats.fixed - stats.waited
+            points[name] = {
+                "calls": stats.calls,
+                "timeouts": stats.timeouts,
+                "unobserved": stats.unobserved,
+                "waited_ms": round(stats.waited * 1000, 1),
+                "fixed_ms": round(stats.fixed * 1000, 1),
+                "saved_ms": round((stats.fixed - stats.waited) * 1000, 1),
+                "saved_per_call_ms": round((stats.fixed - stats.waited) / stats.calls * 1000, 1),
+            }
+        return {"saved_ms": round(saved * 1000, 1), "points": points}
+
+
+# Shared by all Paint tools
+waiter = Waiter()
@@ -0,0 +1,52 @@
+"""Compaction of the talk2mcp transcript.
+
+Run with: python -m pytest test_transcript.py
+"""
+from transcript import Transcript
+
+
+def add_iteration(transcript, iteration, calls):
+    for n in range(calls):
+        transcript.add_call(iteration, f"tool{n}", {"n": n}, f"result {iteration}.{n}")
+
+
+def full_iterations(transcript):
+    return sorted({iteration for iteration, _, _ in transcript.recent})
+
+
+def test_keeps_latest_iterations_with_several_calls_in_full():
+    transcript = Transcript(max_bytes=100000, keep_recent=2)
+    for iteration in range(1, 6):
+        add_iteration(transcript, iteration, 3)
+    assert full_iterations(transcript) == [4, 5]
+    assert len(transcript.recent) == 6
+    assert len(transcript.summary) == 9
+    assert len(transcript) == 15
+
+
+def test_summarizes_older_entries_in_order():
+    transcript = Transcript(max_bytes=100000, keep_recent=1)
+    add_iteration(transcript, 1, 2)
+    add_iteration(transcript, 2, 1)
+    rendered = transcript.render()
+    assert rendered.startswith("Earlier iterations: #1 tool0({'n': 0}) -> result 1.0; #1 tool1")
+    assert "In the 2 iteration you called tool0" in rendered
+
+
+def test_counts_dropped_entries_to_stay_in_budget():
+    transcript = Transcript(max_bytes=600, keep_recent=1)
+    for iteration in range(1, 21):
+        add_iteration(transcript, iteration, 2)
+    assert len(transcript.render().encode("utf-8")) <= 600
+    assert full_iterations(transcript) == [20]
+    assert transcript.dropped + len(transcript.summary) + len(transcript.recent) == 40
+    assert transcript.render().startswith(f"({transcript.dropped} earlier entries omitted)")
+
+
+def test_errors_count_toward_their_iteration():
+    transcript = Transcript(max_bytes=100000, keep_recent=1)
+    add_iteration(transcript, 1, 1)
+    transcript.add_error(2, "boom")
+    add_iteration(transcript, 2, 1)
+    assert full_iterations(transcript) == [2]
+    assert len(transcript.recent) == 2
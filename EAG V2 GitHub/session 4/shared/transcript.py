@@ -0,0 +1,96 @@
+"""Bounded rolling transcript of tool calls for the talk2mcp iteration loop.
+
+Shared by the Paint and Gmail clients, which add this folder to sys.path.
+"""
+
+
+def _shorten(text: str, limit: int) -> str:
+    """Cut text to at most limit characters, marking the cut."""
+    text = " ".join(str(text).split())
+    if len(text) <= limit:
+        return text
+    return text[: max(0, limit - 3)] + "..."
+
+
+class Transcript:
+    """History of the agent loop that is sent back to the LLM on every iteration.
+
+    Each tool call/result is added exactly once. The entries of the latest
+    keep_recent iterations (however many calls each made) are kept in full;
+    older ones are compacted into one-line summaries, and the oldest summaries
+    are dropped once the byte budget is reached, so the size of the rendered
+    prompt stays flat no matter how many iterations run.
+    """
+
+    def __init__(self, max_bytes: int = 4000, keep_recent: int = 3,
+                 max_result_chars: int = 400, summary_chars: int = 120):
+        self.max_bytes = max_bytes
+        self.keep_recent = keep_recent
+        self.max_result_chars = max_result_chars
+        self.summary_chars = summary_chars
+        self.recent = []    # (iteration, full, short) entries of the latest iterations
+        self.summary = []   # one-line summaries of older entries
+        self.dropped = 0    # number of summaries removed to respect the budget
+        self._rendered = None
+
+    def __len__(self):
+        return self.dropped + len(self.summary) + len(self.recent)
+
+    def add_call(self, iteration: int, func_name: str, arguments: dict, result_str: str) -> None:
+        """Record one tool call and its result"""
+        full = (
+            f"In the {iteration} iteration you called {func_name} with {arguments} parameters, "
+            f"and the function returned {_shorten(result_str, self.max_result_chars)}."
+        )
+        short = _shorten(f"#{iteration} {func_name}({arguments}) -> {result_str}", self.summary_chars)
+        self._add(iteration, full, short)
+
+    def add_error(self, iteration: int, message: str) -> None:
+        """Record an error raised while handling an iteration"""
+        full = f"Error in iteration {iteration}: {_shorten(message, self.max_result_chars)}"
+        short = _shorten(f"#{iteration} error: {message}", self.summary_chars)
+        self._add(iteration, full, short)
+
+    def _add(self, iteration: int, full: str, short: str) -> None:
+        self.recent.append((iteration, full, short))
+        self._rendered = None
+        self._compact()
+
+    def _size(self) -> int:
+        return len(self.render().encode("utf-8"))
+
+    def _compact(self) -> None:
+        # Fold everything but the latest keep_recent iterations into summaries
+        iterations = sorted({iteration for iteration, _, _ in self.recent})
+        kept = set(iterations[-self.keep_recent:]) if self.keep_recent > 0 else set()
+        while self.recent and self.recent[0][0] not in kept:
+            _, _, short = self.recent.pop(0)
+            self.summary.append(short)
+            self._rendered = None
+        # Then shed the oldest summaries, and finally old full entries, until we fit
+        while self._size() > self.max_bytes:
+            if self.summary:
+                self.summary.pop(0)
+                self.dropped += 1
+            elif len(self.recent) > 1:
+                _, _, short = self.recent.pop(0)
+                self.summary.append(short)
+            else:
+                break
+            self._rendered = None
+
+    def approx_tokens(self) -> int:
+        """Rough token count of the rendered transcript (about 4 bytes per token)"""
+        return self._size() // 4
+
+    def render(self) -> str:
+        """Text to append to the query for the next LLM call"""
+        if self._rendered is None:
+            lines = []
+            if self.dropped:
+                lines.append(f"({self.dropped} earlier entries omitted)")
+            if self.summary:
+                lines.append("Earlier iterations: " + "; ".join(self.summary))
+            lines.extend(full for _, full, _ in self.recent)
+            self._rendered = "\n".join(lines)
+        return self._rendered
@@ -115,12 +115,18 @@ class Perception:
     def __init__(self, allowed_colors):
         self.allowed_colors = allowed_colors
         self.api_key = os.getenv("GEMINI_API_KEY")
+        # Optional alternate endpoint, e.g. loadtest/fake_gemini.py for offline runs
+        self.base_url = os.getenv("GEMINI_BASE_URL")
         self.log = logging.getLogger("agentpaint.perception")
 
     def run(self, inp: PerceptionInput) -> PerceptionOutput:
         if genai and self.api_key:
             try:
-                genai.configure(api_key=self.api_key)
+                if self.base_url:
+                    genai.configure(api_key=self.api_key, transport="rest",
+                                    client_options={"api_endpoint": self.base_url})
+                else:
+                    genai.configure(api_key=self.api_key)
                 model = genai.GenerativeModel("gemini-1.5-flash")  # lightweight & fast
                 prompt = PERCEPTION_SYSTEM_PROMPT + "\n\nALLOWED COLORS: " + json.dumps(self.allowed_colors) + \
                          "\n\nUSER PROMPT:\n" + inp.prompt + "\n\nReturn only the JSON."
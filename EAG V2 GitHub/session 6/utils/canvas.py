@@ -0,0 +1,129 @@
+"""Drawing surfaces for the Action stage.
+
+WinPaintCanvas drives a live MS Paint window through utils/win_paint.py.
+PillowCanvas applies the same open / select color / write text / close steps
+to an in-memory image and saves it as a PNG when the plan is done, so the
+agent flow runs headless (e.g. on Linux, where pyautogui cannot even be
+imported).
+PAINT_BACKEND=windows|pillow picks one; the default is windows on Windows and
+pillow elsewhere. PAINT_OUTPUT sets where the headless canvas is saved.
+"""
+import logging
+import os
+import sys
+from abc import ABC, abstractmethod
+
+# Same canvas size MS Paint opens with
+CANVAS_SIZE = (1152, 648)
+TEXT_SIZE = 24
+
+
+class Canvas(ABC):
+    """The Paint actions a plan can run"""
+
+    @abstractmethod
+    def open(self) -> bool:
+        """Start a new, blank canvas; False if it could not be opened"""
+
+    @abstractmethod
+    def select_color(self, color: str) -> bool:
+        """Make color the text color; False if it is not available"""
+
+    @abstractmethod
+    def write_text(self, text: str) -> None:
+        """Write text on the canvas"""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Close the canvas"""
+
+    def finish(self) -> None:
+        """Called once after the last step of a plan"""
+
+
+class WinPaintCanvas(Canvas):
+    """The MS Paint window, driven with pywinauto and pyautogui"""
+
+    def __init__(self):
+        self.win = None
+
+    def open(self) -> bool:
+        from utils.win_paint import launch_paint, _get_app_and_window
+
+        launch_paint()
+        _, self.win = _get_app_and_window()
+        return self.win is not None
+
+    def select_color(self, color: str) -> bool:
+        from utils.win_paint import click_palette_color
+
+        return click_palette_color(self.win, color)
+
+    def write_text(self, text: str) -> None:
+        from utils.win_paint import write_text
+
+        write_text(self.win, text)
+
+    def close(self) -> None:
+        from utils.win_paint import close_paint
+
+        close_paint(self.win)
+
+
+class PillowCanvas(Canvas):
+    """Offscreen canvas saved as a PNG when the plan is done"""
+
+    def __init__(self, output_path="paint_output.png", size=CANVAS_SIZE):
+        self.output_path = output_path
+        self.size = size
+        self.image = None
+        self.draw = None
+        self.font = None
+        self.color = "black"
+
+    def open(self) -> bool:
+        # Pillow is only needed for headless runs
+        from PIL import Image, ImageDraw, ImageFont
+
+        self.image = Image.new("RGB", self.size, "white")
+        self.draw = ImageDraw.Draw(self.image)
+        try:
+            self.font = ImageFont.load_default(size=TEXT_SIZE)
+        except TypeError:  # Pillow < 10.1 has a single bitmap font
+            self.font = ImageFont.load_default()
+        return True
+
+    def select_color(self, color: str) -> bool:
+        from PIL import ImageColor
+
+        try:
+            ImageColor.getrgb(color)
+        except ValueError:
+            return False
+        self.color = color
+        return True
+
+    def write_text(self, text: str) -> None:
+        # Centred on the canvas, where win_paint.write_text opens its text box
+        width, height = self.size
+        self.draw.multiline_text(
+            (width // 2, height // 2), text, fill=self.color, font=self.font, anchor="mm"
+        )
+
+    def close(self) -> None:
+        self.finish()
+        self.image = None
+
+    def finish(self) -> None:
+        if self.image is None:
+            return
+        self.image.save(self.output_path, format="PNG")
+        logging.getLogger("agentpaint.action").info("Saved headless canvas to %s", self.output_path)
+
+
+def create_canvas() -> Canvas:
+    """Canvas for PAINT_BACKEND (windows on Windows, pillow elsewhere)"""
+    backend = os.getenv("PAINT_BACKEND", "windows" if sys.platform == "win32" else "pillow").lower()
+    if backend == "pillow":
+        return PillowCanvas(output_path=os.getenv("PAINT_OUTPUT", "paint_output.png"))
+    return WinPaintCanvas()